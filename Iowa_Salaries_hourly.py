@@ -1,997 +1,465 @@
 """This script inspects employee salary data from the State of Iowa database
-retrieved online from: 
-    
+retrieved online from:
+
 https://catalog.data.gov/dataset/state-of-iowa-salary-book
 
-The data includes more than 500,000 entries giving the gender, job title, 
-department, city of residence, pay, and travel expenses for each employee from 
-2007 to 2017, inclusive. The database does not give employee age or tenure in 
-the current position or length of employment with the State. The goal of this 
-project is to infer hourly pay for employees based on the available 
+The data includes more than 500,000 entries giving the gender, job title,
+department, city of residence, pay, and travel expenses for each employee from
+2007 to 2017, inclusive. The database does not give employee age or tenure in
+the current position or length of employment with the State. The goal of this
+project is to infer hourly pay for employees based on the available
 predictors, realizing there may still be substantial variation due to variables
 not available in the data set. Annual salaries were not predicted since many
-employees likely only received salary for part of each year."""
+employees likely only received salary for part of each year.
+
+The steps of the analysis (load, featurize, plot, train, evaluate) are
+functions that can be imported and reused. The predictor matrix is written
+once to a memory-mapped store (see matrix_store.py) that training,
+evaluation, plotting and cross-validation read without copying. Libraries
+such as pandas, matplotlib and scikit-learn are imported inside the functions
+that use them, so each subcommand only loads what it needs.
+
+Usage: python Iowa_Salaries_hourly.py [run] [--csv CSV] [--cross-validation] [--time-split]
+       python Iowa_Salaries_hourly.py featurize CSV STORE_DIR [--chunksize N] [--jobs N]
+       python Iowa_Salaries_hourly.py train-linear [--csv CSV | --store DIR] [--chunksize N] [--check]
+       python Iowa_Salaries_hourly.py matrix (--csv CSV | --store DIR) [MATRIX_DIR]
+       python Iowa_Salaries_hourly.py plot [--csv CSV | --store DIR | --matrix DIR | --summaries JSON]
+       python Iowa_Salaries_hourly.py predict CSV [-o OUT] [--models DIR] [--model NAME ...]"""
 
 # Import necessary packages
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-
-# Read in data (this includes approximately 30% of the data from the original file due to Github file size limits)
-df = pd.read_csv('State_of_Iowa_Salary_Book_Excerpt.csv')
-
-# Insert new column with estimated hourly pay
-def hourly_sal(cols):
-    base_sal = cols[0]
-    total_sal = cols[1]
-    if pd.isnull(base_sal):
-        return
-    elif base_sal.lower() == 'terminated' or base_sal.lower() == 'terminated ' or base_sal == 'HR' or base_sal == 'YR' or base_sal == 'HR+H517753' or base_sal == '20.12HR' or base_sal == '262.99DA':
-        return
-    else:
-        base_sal = base_sal.strip()
-        import re
-        base_sal = re.split(' |/|-', base_sal)
-        #base_sal = base_sal.split()
-        #base_sal = base_sal.split('/')
-        base_sal[0] = base_sal[0].replace(',', '')
-        base_sal[0] = base_sal[0].replace('$', '')
-        if base_sal[-1] == 'BW':
-           hourly_sal = float(base_sal[0]) / 40 / 2
-           # Remove entries with erroneous data (hourly pay very high or very low)
-           if hourly_sal < 3000 and hourly_sal > 5 and hourly_sal != total_sal:
-               return hourly_sal
-           else:
-               return
-        elif base_sal[-1] == 'HR':
-           hourly_sal =  float(base_sal[0])
-           # Remove entries with erroneous data (hourly pay very high or very low)
-           if hourly_sal < 3000 and hourly_sal > 5 and hourly_sal != total_sal:
-               return hourly_sal
-           else:
-               return
-        elif base_sal[-1] == 'YR' or len(base_sal) == 1:
-           hourly_sal = float(base_sal[0]) / 40 / 52
-           # Remove entries with seemingly erroneous data (hourly pay very high or very low)
-           if hourly_sal < 3000 and hourly_sal > 5 and hourly_sal != total_sal:
-               return hourly_sal
-           else:
-               return
+import argparse
+import os
+import sys
+
+# Read in data (this includes approximately 30% of the data from the original file due to Github file size limits).
+DATA_FILE = 'State_of_Iowa_Salary_Book_Excerpt.csv'
+
+# Number of processes used to build the features
+FEATURE_JOBS = 1
+
+# Directory for the figures and number of processes rendering them
+PLOT_DIR = 'plots'
+PLOT_JOBS = 1
+
+# Memory-mapped predictor matrix shared by training, evaluation, plotting and
+# cross-validation (see matrix_store.py)
+MATRIX_DIR = 'feature_matrix'
+
+# Seed for the train/test split, the models and cross-validation folds
+RANDOM_STATE = 0
+
+# Record the wall time, CPU time and peak RSS of each stage in a JSON report in
+# PROFILE_DIR (see profiling.py). TRACE_MEMORY adds tracemalloc allocation
+# counts, which slows pure-Python stages such as plotting several times over.
+# Stages named in PROFILE_STAGES are also run under cProfile, e.g.
+# PROFILE_STAGES = ('position tags', 'random forest')
+PROFILE_DIR = 'profiles'
+TRACE_MEMORY = False
+PROFILE_STAGES = ()
+
+# Model name -> (display name, timer stage)
+ENGINES = {
+    'linear_regression': ('Linear Regression', 'linear regression'),
+    'random_forest': ('Random Forest Regression', 'random forest'),
+    'hist_gradient_boosting': ('Histogram Gradient Boosting Regression', 'hist gradient boosting'),
+}
+
+
+def make_timer():
+    '''Function returns the stage profiler configured above'''
+    from profiling import StageProfiler
+    return StageProfiler(PROFILE_DIR, trace_memory = TRACE_MEMORY, profile_stages = PROFILE_STAGES)
+
+
+def load(path = DATA_FILE, timer = None):
+    '''Function reads the Salary Book
+
+    Only the columns used below are loaded; later runs read from a columnar
+    cache (see salary_book.py).'''
+    from salary_book import load_salary_book
+    timer = timer or make_timer()
+    with timer.stage('load'):
+        return load_salary_book(path)
+
+
+def featurize(df, n_jobs = FEATURE_JOBS, timer = None):
+    '''Function returns the analysis frame
+
+    Inserts hourly pay, Position flags (see position_tags.py), Department
+    indicators (see department_codes.py) and the 'M' gender dummy, fills
+    missing Travel & Subsistence with zero and drops entries with no salary
+    data or gender. Flags are computed once per distinct title/department and
+    gathered back to each row. With n_jobs > 1 the fiscal years are built in
+    parallel processes.'''
+    from features import build_features, build_features_parallel
+    from vocabulary import VocabularyStats
+    timer = timer or make_timer()
+    vocab = VocabularyStats()
+    if n_jobs > 1:
+        with timer.stage('featurize'):
+            df_an = build_features_parallel(df, n_jobs = n_jobs, partition = 'Fiscal Year', stats = vocab)
+    else:
+        df_an = build_features(df, stats = vocab, timer = timer)
+    vocab.report()
+    return df_an
+
+
+def plot(df_an, directory = PLOT_DIR, n_jobs = PLOT_JOBS, timer = None):
+    '''Function draws the boxplots of hourly pay
+
+    Boxplots of hourly pay by fiscal year, gender and the Head Coach,
+    President, Chief, Attorney and Legislative Branch flags are written to
+    directory as PNG and SVG files (see plots.py). The boxes are drawn from
+    percentile summaries, saved as boxplot_summary.json so the figures can be
+    redrawn without the data.'''
+    from plots import render_boxplots
+    timer = timer or make_timer()
+    with timer.stage('plot'):
+        plot_paths = render_boxplots(df_an, directory, n_jobs = n_jobs)
+    for heading, paths in plot_paths.items():
+        print('\n%s: %s' % (heading, ', '.join(paths)))
+    return plot_paths
+
+
+def predictors(df_an, timer = None):
+    '''Function returns the predictors (Position flags, Department indicators
+    and M) as a sparse matrix with a stable column order, the column names and
+    the hourly pay; every model below takes the matrix directly'''
+    from features import design_matrix, matrix_nbytes
+    from profiling import format_mb, peak_rss_mb
+    timer = timer or make_timer()
+    with timer.stage('predictors'):
+        X, feature_columns = design_matrix(df_an, sparse = True)
+    print('\nPredictor matrix: %d rows x %d columns, %.1f MB sparse (%.1f MB as dense int64)'
+          % (X.shape[0], X.shape[1], matrix_nbytes(X) / 2**20, X.shape[0] * X.shape[1] * 8 / 2**20))
+    print('Peak RSS after building predictors: %s MB' % format_mb(peak_rss_mb()))
+    return X, feature_columns, df_an['Hourly_Pay']
+
+
+def write_matrix(df_an, directory = MATRIX_DIR, timer = None):
+    '''Function writes the predictors, hourly pay and fiscal year to a
+    memory-mapped matrix store and returns it opened
+
+    Rows are written in the order of a seeded 70/30 train_test_split, training
+    rows first, so the training and test sets are contiguous ranges that every
+    stage maps from the same files instead of copying.'''
+    import numpy as np
+    from sklearn.model_selection import train_test_split
+    from matrix_store import write_matrix_store
+    timer = timer or make_timer()
+    X, feature_columns, y = predictors(df_an, timer)
+    with timer.stage('matrix store'):
+        train_rows, test_rows = train_test_split(np.arange(X.shape[0]), test_size = 0.30,
+                                                 random_state = RANDOM_STATE)
+        order = np.concatenate([train_rows, test_rows])
+        return write_matrix_store(directory, X[order], y.to_numpy()[order], df_an['Fiscal Year'].to_numpy()[order],
+                                  feature_columns, metadata = {'train_rows': len(train_rows)})
+
+
+def train(X_train, y_train, feature_columns, engines = ENGINES, timer = None):
+    '''Function fits each model and returns the models by name with the
+    backward elimination log of the linear model'''
+    timer = timer or make_timer()
+    models = {}
+    elimination = None
+    if 'linear_regression' in engines:
+        # LINEAR REGRESSION
+        # Predictors with large p values are removed by backward elimination.
+        # Each removal updates the factorization of X'X instead of refitting
+        # (see ols.py), and the same fit gives the predictions and the
+        # statistical summary.
+        from ols import NormalEquations, backward_elimination
+        with timer.stage('linear regression'):
+            equations = NormalEquations(X_train.shape[1]).update(X_train, y_train)
+            models['linear_regression'], elimination = backward_elimination(equations, feature_columns,
+                                                                            significance = 0.05)
+    if 'random_forest' in engines:
+        # RANDOM FOREST REGRESSION
+        # Fit the random forest on all cores
+        from training import fit_random_forest
+        with timer.stage('random forest'):
+            models['random_forest'] = fit_random_forest(X_train, y_train, n_estimators = 100, n_jobs = -1,
+                                                        random_state = RANDOM_STATE)
+    if 'hist_gradient_boosting' in engines:
+        # HISTOGRAM GRADIENT BOOSTING REGRESSION
+        # Fit histogram-based gradient boosting as a faster, smaller alternative to the random forest
+        from training import fit_hist_gradient_boosting
+        with timer.stage('hist gradient boosting'):
+            models['hist_gradient_boosting'] = fit_hist_gradient_boosting(X_train, y_train,
+                                                                         random_state = RANDOM_STATE)
+    return models, elimination
+
+
+def evaluate(models, X_test, y_test, elimination = None, plot_dir = PLOT_DIR):
+    '''Function prints the error metrics of each model on the test set, plots
+    actual against predicted hourly pay and returns the metrics by name'''
+    from metrics import regression_metrics
+    from plots import render_scatter
+    results = {}
+    for name, model in models.items():
+        display_name = ENGINES[name][0]
+        pred = model.predict(X_test)
+        print('\n\n%s RESULTS' % display_name.upper())
+        print('------------------------------------------------------------------')
+        if name == 'linear_regression' and elimination is not None:
+            print('\nPredictors with large p values were removed from the analysis using backward elimination.\n')
+
+        # Calculate the error metrics
+        results[name] = regression_metrics(y_test, pred)
+        print(results[name].report())
+
+        if name == 'linear_regression' and elimination is not None:
+            # Check Linear Regression Statistics (from the training fit, without refitting)
+            print('\n\nStatistical Summary: \n', model.summary(), '\n\n')
+            print('Predictors removed by backward elimination (p value when removed):')
+            for step in elimination['steps']:
+                print('   ', step['dropped'], step.get('reason') or '%.4f' % step['p_value'])
+            print('\n')
+
+        # Plot Actual Salary v Predicted Salary
+        print('\n%s RESULTS PLOT - Actual Hourly Pay v Predicted Pay' % display_name.upper())
+        print(', '.join(render_scatter(y_test, pred, '%s Results' % display_name, os.path.join(plot_dir, name))))
+    return results
+
+
+def report_costs(models, timer):
+    '''Function prints the training time and size of each model'''
+    from training import model_size
+    print('\n\nMODEL COST')
+    print('------------------------------------------------------------------')
+    for name, model in models.items():
+        display_name, stage = ENGINES[name]
+        print('%-40s training time %8.2f s, model size %10.1f kB'
+              % (display_name, timer.seconds[stage], model_size(model) / 1024))
+
+
+def cross_validate(X, y, timer = None):
+    '''Function compares the model configurations in
+    cross_validation.DEFAULT_GRID over seeded K folds run in parallel'''
+    from cross_validation import cross_validate_grid
+    timer = timer or make_timer()
+    with timer.stage('cross-validation'):
+        cv_results = cross_validate_grid(X, y, n_splits = 5, seed = RANDOM_STATE)
+    print('\n\nCROSS-VALIDATION RESULTS (5 folds)')
+    print('------------------------------------------------------------------')
+    print(cv_results.to_string(index = False, float_format = lambda v: '%.2f' % v))
+    return cv_results
+
+
+def time_split(df_an, timer = None):
+    '''Function caches each fiscal year's features once, then trains on years
+    <= N and tests on N + 1 (see time_split.py)
+
+    The years are cached in a temporary directory, so the persistent state of
+    incremental.py is neither changed nor read.'''
+    import tempfile
+    from incremental import IncrementalState
+    from time_split import rolling_evaluation
+    timer = timer or make_timer()
+    with timer.stage('time split'), tempfile.TemporaryDirectory(prefix = 'salary_time_split_') as directory:
+        state = IncrementalState(directory)
+        for year, rows in df_an.groupby('Fiscal Year', sort = True):
+            state.add_year(int(year), rows)
+        time_results = rolling_evaluation(state, seed = RANDOM_STATE)
+    print('\n\nROLLING FISCAL YEAR EVALUATION')
+    print('------------------------------------------------------------------')
+    print(time_results.to_string(index = False, float_format = lambda v: '%.2f' % v))
+    return time_results
+
+
+def run(csv = DATA_FILE, run_cross_validation = False, run_time_split = False, models_dir = None):
+    '''Function runs the whole analysis: load, featurize, plot, train on a
+    seeded 70/30 split, evaluate, optionally cross-validate and evaluate by
+    fiscal year, and save the models'''
+    from model_store import DEFAULT_MODEL_DIR, save_models
+    from plots import BOXPLOT_FIGURES
+    from profiling import format_mb, peak_rss_mb
+
+    timer = make_timer()
+    df_an = featurize(load(csv, timer), timer = timer)
+
+    # Write the predictors once and map them in every later stage
+    matrix = write_matrix(df_an, timer = timer)
+    X, y, feature_columns = matrix.X, matrix.y, matrix.feature_columns
+    plot(matrix.frame([figure[2] for figure in BOXPLOT_FIGURES]), timer = timer)
+    # Only the time split reads the featurized frame again; otherwise free it
+    # so training does not hold a second copy of the data next to the store
+    if not run_time_split:
+        del df_an
+
+    # Training and test sets
+    train_rows = matrix.metadata['train_rows']
+    X_train, y_train = matrix.rows(0, train_rows)
+    X_test, y_test = matrix.rows(train_rows, X.shape[0])
+    models, elimination = train(X_train, y_train, feature_columns, timer = timer)
+    test_metrics = evaluate(models, X_test, y_test, elimination)
+    report_costs(models, timer)
+    if run_cross_validation:
+        cross_validate(X, y, timer)
+    if run_time_split:
+        time_split(df_an, timer)
+
+    # SAVE MODELS
+    # Save the fitted models with the predictor columns so that new rows can be
+    # scored by the predict subcommand without retraining. New fiscal years can
+    # be added to the forest with training.py instead of refitting all of the trees.
+    models_dir = models_dir or DEFAULT_MODEL_DIR
+    save_models(models, feature_columns, models_dir,
+                metadata = {'training_seconds': timer.seconds, 'backward_elimination': elimination,
+                            'test_metrics': {name: m._asdict() for name, m in test_metrics.items()}})
+    timer.append_log(models_dir, command = 'train', rows = X_train.shape[0])
+    timer.report()
+    print('Run report written to %s' % timer.write_report(rows = X.shape[0], columns = X.shape[1]))
+    print('Peak RSS after training: %s MB' % format_mb(peak_rss_mb()))
+    return models, test_metrics
+
+
+def train_linear_out_of_core(csv = DATA_FILE, store = None, chunksize = 100000, models_dir = None,
+                             check = False, tolerance = 1e-6):
+    '''Function fits the linear model on all rows one chunk at a time and
+    saves it
+
+    Chunks are the parts of a feature store, or chunksize rows of the CSV
+    featurized as they are read, so memory use is bounded by the chunk size.
+    With check=True the model is also fitted in memory and the largest
+    coefficient difference must be within tolerance.'''
+    from feature_store import FeatureStore
+    from features import build_features, feature_columns
+    from model_store import DEFAULT_MODEL_DIR, save_models
+    from profiling import format_mb, peak_rss_mb
+    from salary_book import read_salary_book
+    from training import coefficient_difference, fit_linear_out_of_core
+
+    timer = make_timer()
+    if store is not None:
+        frames = FeatureStore(store).iter_parts()
+    else:
+        frames = (build_features(chunk) for chunk in read_salary_book(csv, chunksize = chunksize))
+    with timer.stage('linear regression out of core'):
+        lm, elimination, chunks = fit_linear_out_of_core(frames, feature_columns())
+    print('Linear model fitted on %d rows in %d chunks; peak RSS %s MB'
+          % (lm.nobs, chunks, format_mb(peak_rss_mb())))
+    print(lm.summary())
+
+    difference = None
+    if check:
+        if store is not None:
+            df_an = FeatureStore(store).read()
         else:
-           return
-df['Hourly_Pay'] = df[['Base Salary', 'Total Salary Paid']].apply(hourly_sal, axis=1)
-
-# POSITION TAGS
-# Insert column to check if employee is head coach
-def isheadcoach(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif position.lower() == 'head coach':
-        return 1
-    else:
-        return 0
-df['Head Coach'] = df[['Position']].apply(isheadcoach, axis = 1)
-
-# Insert column to check if employee is coach
-def iscoach(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif 'coach' in position.lower().split():
-        return 1
-    else:
-        return 0
-df['Coach'] = df[['Position']].apply(iscoach, axis = 1)
-
-# Insert column to check if employee has "President" in title
-def ispres(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif 'president' in position.lower().split():
-        return 1
-    else:
-        return 0
-df['Pres'] = df[['Position']].apply(ispres, axis = 1)
-
-# Insert column to check if employee has "Vice" in title
-def isvice(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif ('vice' in position.lower().split()) or ('vp' in position.lower().split()):
-        return 1
-    else:
-        return 0
-df['Vice'] = df[['Position']].apply(isvice, axis = 1)
-
-# Insert column to check if employee has "Dean" in title
-def isdean(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif 'dean' in position.lower().split():
-        return 1
-    else:
-        return 0
-df['Dean'] = df[['Position']].apply(isdean, axis = 1)
-
-# Insert column to check if employee is physician
-def isphysician(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif 'physician' in position.lower().split():
-        return 1
-    else:
-        return 0
-df['Physician'] = df[['Position']].apply(isphysician, axis = 1)
-
-# Insert column to check if employee is attorney
-def isattorney(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif 'attorney' in position.lower().split():
-        return 1
-    else:
-        return 0
-df['Attorney'] = df[['Position']].apply(isattorney, axis = 1)
-
-# Insert column to check if employee is engineer
-def iseng(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif ('engineer' in position.lower().split()) or ('eng' in position.lower().split()):
-        return 1
-    else:
-        return 0
-df['Eng'] = df[['Position']].apply(iseng, axis = 1)
-
-# Insert column to check if employee is executive
-def isexec(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif ('exec' in position.lower().split()) or ('executive' in position.lower().split()):
-        return 1
-    else:
-        return 0
-df['Exec'] = df[['Position']].apply(isexec, axis = 1)
-
-# Insert column to check if employee works for lottery
-def islottery(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif 'lottery' in position.lower().split():
-        return 1
-    else:
-        return 0
-df['Lott'] = df[['Position']].apply(islottery, axis = 1)
-
-# Insert column to check if employee is graudate student
-def isgrad(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif ('grad' in position.lower().split()) or (position.lower() == 'scholar/trainee'):
-        return 1
-    else:
-        return 0
-df['Grad'] = df[['Position']].apply(isgrad, axis = 1)
-
-# Insert column to check if employee is graudate professor
-def isprof(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif ('prof' in position.lower().split()) or ('professor' in position.lower().split()):
-        return 1
-    else:
-        return 0
-df['Prof'] = df[['Position']].apply(isprof, axis = 1)
-
-# Insert column to check if employee is storekeeper
-def isstore(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif 'storekeeper' in position.lower().split():
-        return 1
-    else:
-        return 0
-df['Store'] = df[['Position']].apply(isstore, axis = 1)
-
-# Insert column to check if "Chief" appears in employee title
-def ischief(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif 'chief' in position.lower().split():
-        return 1
-    else:
-        return 0
-df['Chief'] = df[['Position']].apply(ischief, axis = 1)
-
-# Insert column to check if employee is a director
-def isdir(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif ('director' in position.lower().split()) or ('dir' in position.lower().split()):
-        return 1
-    else:
-        return 0
-df['Dir'] = df[['Position']].apply(isdir, axis = 1)
-
-# Insert column to check if employee is a secretary
-def issec(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif 'secretary' in position.lower().split():
-        return 1
-    else:
-        return 0
-df['Sec'] = df[['Position']].apply(issec, axis = 1)
-
-# Insert column to check if employee is an admin
-def isadmin(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif ('admin' in position.lower().split()) or ('administrative' in position.lower().split()):
-        return 1
-    else:
-        return 0
-df['Admin'] = df[['Position']].apply(isadmin, axis = 1)
-
-# Insert column to check if employee is a custodian
-def iscust(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif 'custodian' in position.lower().split():
-        return 1
-    else:
-        return 0
-df['Cust'] = df[['Position']].apply(iscust, axis = 1)
-
-# Insert column to check if employee is an intern
-def isintern(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif 'intern' in position.lower().split():
-        return 1
-    else:
-        return 0
-df['Intern'] = df[['Position']].apply(isintern, axis = 1)
-
-# Insert column to check if employee is in tech
-def istech(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif ('tech' in position.lower().split()) or ('technology' in position.lower().split()):
-        return 1
-    else:
-        return 0
-df['Tech'] = df[['Position']].apply(istech, axis = 1)
-
-# Insert column to check if employee is a teacher
-def isteach(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif ('teacher' in position.lower().split()) or ('instructor' in position.lower().split()):
-        return 1
-    else:
-        return 0
-df['Teach'] = df[['Position']].apply(isteach, axis = 1)
-
-# Insert column to check if employee's position is listed as 'Americorp'
-def isamericorp(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif 'americorp' in position.lower().split():
-        return 1
-    else:
-        return 0
-df['Americorp'] = df[['Position']].apply(isamericorp, axis = 1)
-
-# Insert column to check if employee's position is a correctional officer
-def iscor(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif 'correctional' in position.lower().split():
-        return 1
-    else:
-        return 0
-df['Corr'] = df[['Position']].apply(iscor, axis = 1)
-
-# Insert column to check if employee's position is a maintenance worker
-def ismaint(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif 'maint' in position.lower().split():
-        return 1
-    else:
-        return 0
-df['Maint'] = df[['Position']].apply(ismaint, axis = 1)
-
-# Insert column to check if employee's position is as clerk
-def isclerk(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif 'clerk' in position.lower().split():
-        return 1
-    else:
-        return 0
-df['Clerk'] = df[['Position']].apply(isclerk, axis = 1)
-
-# Insert column to check if employee's position is as sergeant
-def isser(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif 'sergeant' in position.lower().split():
-        return 1
-    else:
-        return 0
-df['Serg'] = df[['Position']].apply(isser, axis = 1)
-
-# Insert column to check if employee's position includes word 'network'
-def isnet(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif 'network' in position.lower().split():
-        return 1
-    else:
-        return 0
-df['Net'] = df[['Position']].apply(isnet, axis = 1)
-
-# Insert column to check if employee's position includes the word "athletics"
-def isath(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif ('athletics' in position.lower().split()) or ('athletic' in position.lower().split()):
-        return 1
-    else:
-        return 0
-df['Ath'] = df[['Position']].apply(isath, axis = 1)
-
-# Insert column to check if employee's position includes the word "aide"
-def isaide(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif ('aide' in position.lower().split()):
-        return 1
-    else:
-        return 0
-df['Aide'] = df[['Position']].apply(isaide, axis = 1)
-
-# Insert column to check if employee's position includes word "associate"
-def isassoc(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif ('assoc' in position.lower().split()) or ('associate' in position.lower().split()):
-        return 1
-    else:
-        return 0
-df['Assoc'] = df[['Position']].apply(isassoc, axis = 1)
-
-# Insert column to check if employee's position includes word "assistant"
-def isassist(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif ('asst' in position.lower().split()) or ('assist' in position.lower().split()) or ('assistant' in position.lower().split()):
-        return 1
-    else:
-        return 0
-df['Assist'] = df[['Position']].apply(isassist, axis = 1)
-
-# Insert column to check if employee's position includes word "adjunct"
-def isadj(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif ('adjunct' in position.lower().split()) or ('adj' in position.lower().split()):
-        return 1
-    else:
-        return 0
-df['Adjunct'] = df[['Position']].apply(isadj, axis = 1)
-
-# Insert column to check if employee's position includes word "monthly"
-def ismonthly(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif ('monthly' in position.lower().split()):
-        return 1
-    else:
-        return 0
-df['Monthly'] = df[['Position']].apply(ismonthly, axis = 1)
-
-# Insert column to check if employee's position includes number "1"
-def isone(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif ('1' in position.lower().split()) or ('i' in position.lower().split()):
-        return 1
-    else:
-        return 0
-df['One'] = df[['Position']].apply(isone, axis = 1)
-
-# Insert column to check if employee's position includes number "2"
-def istwo(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif ('2' in position.lower().split()) or ('ii' in position.lower().split()):
-        return 1
-    else:
-        return 0
-df['Two'] = df[['Position']].apply(istwo, axis = 1)
-
-# Insert column to check if employee's position includes number "3"
-def isthree(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif ('3' in position.lower().split()) or ('iii' in position.lower().split()):
-        return 1
-    else:
-        return 0
-df['Three'] = df[['Position']].apply(isthree, axis = 1)
-
-def isfour(cols):
-    position = cols[0]
-    if pd.isnull(position):
-        return 0
-    elif ('4' in position.lower().split()) or ('iv' in position.lower().split()):
-        return 1
-    else:
-        return 0
-df['Four'] = df[['Position']].apply(isfour, axis = 1)
-
-# DEPARTMENT VALUES
-# Insert column to check if employee's department is University of Iowa
-def isuofi(cols):
-    dept = cols[0]
-    if pd.isnull(dept):
-        return 0
-    elif dept == 'University of Iowa':
-        return 1
-    else:
-        return 0
-df['U_of_I'] = df[['Department']].apply(isuofi, axis = 1)
-
-# Insert column to check if employee's department is Iowa State University
-def isistate(cols):
-    dept = cols[0]
-    if pd.isnull(dept):
-        return 0
-    elif dept == 'Iowa State University':
-        return 1
-    else:
-        return 0
-df['Iowa_State'] = df[['Department']].apply(isistate, axis = 1)
-
-# Insert column to check if employee's department is Department of Transportation
-def isdot(cols):
-    dept = cols[0]
-    if pd.isnull(dept):
-        return 0
-    elif dept == 'Transportation, Department of':
-        return 1
-    else:
-        return 0
-df['DOT'] = df[['Department']].apply(isdot, axis = 1)
-
-# Insert column to check if employee's department is Department of Corrections
-def isdoc(cols):
-    dept = cols[0]
-    if pd.isnull(dept):
-        return 0
-    elif dept == 'Corrections, Department of':
-        return 1
-    else:
-        return 0
-df['DOC'] = df[['Department']].apply(isdoc, axis = 1)
-
-# Insert column to check if employee's department is University of Northern Iowa
-def isuni(cols):
-    dept = cols[0]
-    if pd.isnull(dept):
-        return 0
-    elif dept == 'University of Northern Iowa':
-        return 1
-    else:
-        return 0
-df['UNI'] = df[['Department']].apply(isuni, axis = 1)
-
-# Insert column to check if employee's department is Judicial Branch
-def isjb(cols):
-    dept = cols[0]
-    if pd.isnull(dept):
-        return 0
-    elif dept == 'Judicial Branch':
-        return 1
-    else:
-        return 0
-df['JB'] = df[['Department']].apply(isjb, axis = 1)
-
-# Insert column to check if employee's department is Dept. of Natural Resources
-def isdnr(cols):
-    dept = cols[0]
-    if pd.isnull(dept):
-        return 0
-    elif dept == 'Natural Resources, Department of':
-        return 1
-    else:
-        return 0
-df['DNR'] = df[['Department']].apply(isdnr, axis = 1)
-
-# Insert column to check if employee's department is Dept. of Public Safety
-def isdps(cols):
-    dept = cols[0]
-    if pd.isnull(dept):
-        return 0
-    elif dept == 'Public Safety, Department of':
-        return 1
-    else:
-        return 0
-df['DPS'] = df[['Department']].apply(isdps, axis = 1)
-
-# Insert column to check if employee's department is Iowa Veterans Home
-def isivh(cols):
-    dept = cols[0]
-    if pd.isnull(dept):
-        return 0
-    elif dept == 'Iowa Veterans Home':
-        return 1
-    else:
-        return 0
-df['IVH'] = df[['Department']].apply(isivh, axis = 1)
-
-# Insert column to check if employee's department is Iowa Workforce Development
-def isiwd(cols):
-    dept = cols[0]
-    if pd.isnull(dept):
-        return 0
-    elif dept == 'Iowa Workforce Development':
-        return 1
-    else:
-        return 0
-df['IWD'] = df[['Department']].apply(isiwd, axis = 1)
-
-# Insert column to check if employee's department is Department of Education
-def isdoe(cols):
-    dept = cols[0]
-    if pd.isnull(dept):
-        return 0
-    elif dept == 'Education, Department of':
-        return 1
-    else:
-        return 0
-df['DOE'] = df[['Department']].apply(isdoe, axis = 1)
-
-# Insert column to check if employee's department is Dept. of Inspections and Appeals
-def isdia(cols):
-    dept = cols[0]
-    if pd.isnull(dept):
-        return 0
-    elif dept == 'Inspections & Appeals, Department of':
-        return 1
-    else:
-        return 0
-df['DIA'] = df[['Department']].apply(isdia, axis = 1)
-
-# Insert column to check if employee's department is Dept. of Inspections and Appeals
-def isleg(cols):
-    dept = cols[0]
-    if pd.isnull(dept):
-        return 0
-    elif dept == 'Legislative Branch':
-        return 1
-    else:
-        return 0
-df['Leg'] = df[['Department']].apply(isleg, axis = 1)
-
-# Insert column to check if employee's department is Dept. of Public Defense
-def isdpd(cols):
-    dept = cols[0]
-    if pd.isnull(dept):
-        return 0
-    elif dept == 'Public Defense, Department of':
-        return 1
-    else:
-        return 0
-df['DPD'] = df[['Department']].apply(isdpd, axis = 1)
-
-# Insert column to check if employee's department is Dept. of Commerce
-def isdcom(cols):
-    dept = cols[0]
-    if pd.isnull(dept):
-        return 0
-    elif dept == 'Commerce, Department of':
-        return 1
-    else:
-        return 0
-df['DCom'] = df[['Department']].apply(isdcom, axis = 1)
-
-# Insert column to check if employee's department is Dept. of Administrative Services
-def isdas(cols):
-    dept = cols[0]
-    if pd.isnull(dept):
-        return 0
-    elif dept == 'Administrative Services, Department of':
-        return 1
-    else:
-        return 0
-df['DAS'] = df[['Department']].apply(isdas, axis = 1)
-
-# Insert column to check if employee's department is Board of Regents
-def isbor(cols):
-    dept = cols[0]
-    if pd.isnull(dept):
-        return 0
-    elif dept == 'Regents, Board of':
-        return 1
-    else:
-        return 0
-df['BoR'] = df[['Department']].apply(isbor, axis = 1)
-
-# Insert column to check if employee's department is Attorney General
-def isag(cols):
-    dept = cols[0]
-    if pd.isnull(dept):
-        return 0
-    elif dept == 'Attorney General, Office of':
-        return 1
-    else:
-        return 0
-df['AG'] = df[['Department']].apply(isag, axis = 1)
-
-# TRAVEL AND SUBISTENCE INFORMATION
-# Change Travel & Subsistence to zero if no value given
-def trav(cols):
-    trav_cost = cols[0]
-    if pd.isnull(trav_cost):
-        return 0
-    else:
-        return trav_cost
-df['Travel & Subsistence'] = df[['Travel & Subsistence']].apply(trav, axis = 1)
-
-# Drop entries with no salary data
-df_an = df[df['Hourly_Pay'] > 0]
-
-# Import data test categorical columns - gender
-def gender_fil(cols):
-    gen = cols[0]
-    if gen in ['M', 'F']:
-        return True
-    else:
-        return False
-gender_fil = df_an[['Gender']].apply(gender_fil, axis = 1)
-df_an = df_an[gender_fil]
-gender = pd.get_dummies(df_an['Gender'], drop_first = True)
-df_an.drop(['Gender'], axis=1, inplace=True)
-df_an = pd.concat([df_an, gender], axis=1)
-
-
-# PLOT SOME OF THE DATA
-# 
-# Create boxplot showing hourly pay by year
-print('\nSALARY V. FISCAL YEAR:')
-fig = plt.figure(figsize=(20, 6))
-ax = plt.subplot(1, 11, 1)
-
-ax.boxplot((df_an[df_an['Fiscal Year'] == 2007]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yticks(np.arange(0, 4))
-ax.set_yticklabels(10.0**np.arange(0, 4))
-ax.set_ylim(1, 3000)
-ax.set_yscale('log')
-ax.set_ylabel('Hourly Pay [$]')
-ax.set_title('2007')
-
-ax = plt.subplot(1, 11, 2)
-ax.boxplot((df_an[df_an['Fiscal Year'] == 2008]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yscale('log')
-ax.set_ylim(1, 3000)
-ax.set_title('2008')
-
-ax = plt.subplot(1, 11, 3)
-ax.boxplot((df_an[df_an['Fiscal Year'] == 2009]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yscale('log')
-ax.set_ylim(1, 3000)
-ax.set_title('2009')
-
-ax = plt.subplot(1, 11, 4)
-ax.boxplot((df_an[df_an['Fiscal Year'] == 2010]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yscale('log')
-ax.set_ylim(1, 3000)
-ax.set_title('2010')
-
-ax = plt.subplot(1, 11, 5)
-ax.boxplot((df_an[df_an['Fiscal Year'] == 2011]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yscale('log')
-ax.set_ylim(1, 3000)
-ax.set_title('2011')
-
-ax = plt.subplot(1, 11, 6)
-ax.boxplot((df_an[df_an['Fiscal Year'] == 2012]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yscale('log')
-ax.set_ylim(1, 3000)
-ax.set_title('2012')
-
-ax = plt.subplot(1, 11, 7)
-ax.boxplot((df_an[df_an['Fiscal Year'] == 2013]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yscale('log')
-ax.set_ylim(1, 3000)
-ax.set_title('2013')
-
-ax = plt.subplot(1, 11, 8)
-ax.boxplot((df_an[df_an['Fiscal Year'] == 2014]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yscale('log')
-ax.set_ylim(1, 3000)
-ax.set_title('2014')
-
-ax = plt.subplot(1, 11, 9)
-ax.boxplot((df_an[df_an['Fiscal Year'] == 2015]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yscale('log')
-ax.set_ylim(1, 3000)
-ax.set_title('2015')
-
-ax = plt.subplot(1, 11, 10)
-ax.boxplot((df_an[df_an['Fiscal Year'] == 2016]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yscale('log')
-ax.set_ylim(1, 3000)
-ax.set_title('2016')
-
-ax = plt.subplot(1, 11, 11)
-ax.boxplot((df_an[df_an['Fiscal Year'] == 2017]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yscale('log')
-ax.set_ylim(1, 3000)
-ax.set_title('2017')
-plt.show()
-
-
-# Create boxplot showing hourly pay by Gender
-print('\nHOURLY PAY V. GENDER:')
-fig = plt.figure(figsize=(9, 6))
-ax = plt.subplot(1, 2, 1)
-
-ax.boxplot((df_an[df_an['M'] == 1]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yticks(np.arange(0, 4))
-ax.set_yticklabels(10.0**np.arange(0, 4))
-ax.set_ylim(1, 3000)
-ax.set_yscale('log')
-ax.set_ylabel('Hourly Pay [$]')
-ax.set_title('Male')
-
-ax = plt.subplot(1, 2, 2)
-ax.boxplot((df_an[df_an['M'] == 0]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yscale('log')
-ax.set_ylim(1, 3000)
-ax.set_ylabel('Hourly Pay [$]')
-ax.set_title('Female')
-plt.show()
-
-# Create boxplot showing hourly pay by Head Coach Flag
-print('\nHOURLY PAY V. "HEAD COACH" JOB FLAG:')
-fig = plt.figure(figsize=(9, 6))
-ax = plt.subplot(1, 2, 1)
-
-ax.boxplot((df_an[df_an['Head Coach'] == 1]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yticks(np.arange(0, 4))
-ax.set_yticklabels(10.0**np.arange(0, 4))
-ax.set_ylim(1, 3000)
-ax.set_yscale('log')
-ax.set_ylabel('Hourly Pay [$]')
-ax.set_title('"Head Coach" in job title')
-
-ax = plt.subplot(1, 2, 2)
-ax.boxplot((df_an[df_an['Head Coach'] == 0]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yscale('log')
-ax.set_ylim(1, 3000)
-ax.set_ylabel('Hourly Pay [$]')
-ax.set_title('"Head Coach" not in job title')
-plt.show()
-
-# Create boxplot showing hourly pay by President Flag
-print('\nHOURLY PAY V. "PRESIDENT" JOB FLAG:')
-fig = plt.figure(figsize=(9, 6))
-ax = plt.subplot(1, 2, 1)
-
-ax.boxplot((df_an[df_an['Pres'] == 1]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yticks(np.arange(0, 4))
-ax.set_yticklabels(10.0**np.arange(0, 4))
-ax.set_ylim(1, 3000)
-ax.set_yscale('log')
-ax.set_ylabel('Hourly Pay [$]')
-ax.set_title('"President" in job title')
-
-ax = plt.subplot(1, 2, 2)
-ax.boxplot((df_an[df_an['Pres'] == 0]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yscale('log')
-ax.set_ylim(1, 3000)
-ax.set_ylabel('Hourly Pay [$]')
-ax.set_title('"President" not in job title')
-plt.show()
-
-# Create boxplot showing hourly pay by Chief Flag
-print('\nHOURLY PAY V. "CHIEF" JOB FLAG:')
-fig = plt.figure(figsize=(9, 6))
-ax = plt.subplot(1, 2, 1)
-
-ax.boxplot((df_an[df_an['Chief'] == 1]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yticks(np.arange(0, 4))
-ax.set_yticklabels(10.0**np.arange(0, 4))
-ax.set_ylim(1, 3000)
-ax.set_yscale('log')
-ax.set_ylabel('Hourly Pay [$]')
-ax.set_title('"Chief" in job title')
-
-ax = plt.subplot(1, 2, 2)
-ax.boxplot((df_an[df_an['Chief'] == 0]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yscale('log')
-ax.set_ylim(1, 3000)
-ax.set_ylabel('Hourly Pay [$]')
-ax.set_title('"Chief" not in job title')
-plt.show()
-
-# Create boxplot showing hourly pay by Attorney Flag
-print('\nHOURLY PAY V. "ATTORNEY" JOB FLAG:')
-fig = plt.figure(figsize=(9, 6))
-ax = plt.subplot(1, 2, 1)
-
-ax.boxplot((df_an[df_an['Attorney'] == 1]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yticks(np.arange(0, 4))
-ax.set_yticklabels(10.0**np.arange(0, 4))
-ax.set_ylim(1, 3000)
-ax.set_yscale('log')
-ax.set_ylabel('Hourly Pay [$]')
-ax.set_title('"Attorney" in job title')
-
-ax = plt.subplot(1, 2, 2)
-ax.boxplot((df_an[df_an['Attorney'] == 0]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yscale('log')
-ax.set_ylim(1, 3000)
-ax.set_ylabel('Hourly Pay [$]')
-ax.set_title('"Attorney" not in job title')
-plt.show()
-
-# Create boxplot showing hourly pay by Legislative Branch Flag
-print('\nHOURLY PAY V. "LEGISLATIVE BRANCH" DEPARTMENT FLAG:')
-fig = plt.figure(figsize=(9, 6))
-ax = plt.subplot(1, 2, 1)
-
-ax.boxplot((df_an[df_an['Leg'] == 1]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yticks(np.arange(0, 4))
-ax.set_yticklabels(10.0**np.arange(0, 4))
-ax.set_ylim(1, 3000)
-ax.set_yscale('log')
-ax.set_ylabel('Hourly Pay [$]')
-ax.set_title('Legislative Branch Employee')
-
-ax = plt.subplot(1, 2, 2)
-ax.boxplot((df_an[df_an['U_of_I'] == 0]['Hourly_Pay']), notch = True, whis = [5, 95], patch_artist = True)
-ax.set_yscale('log')
-ax.set_ylim(1, 3000)
-ax.set_ylabel('Hourly Pay [$]')
-ax.set_title('Not Legislative Branch Employee')
-plt.show()
-
-# Create training and test sets
-from sklearn.model_selection import train_test_split
-y = df_an['Hourly_Pay']
-# Drop columns not used in the analysis
-X = df_an.drop(['Agency/Institution', 'Base Salary', 'Position', 'Base Salary Date', 'Total Salary Paid', 'Name', 'Place of Residence', 'Hourly_Pay', 'Department', 'Travel & Subsistence', 'Fiscal Year'], axis = 1)
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size = 0.30)
-
-# LINEAR REGRESSION
-# Create the Linear Regression Training Model using all predictors
-from sklearn.linear_model import LinearRegression
-lm = LinearRegression()
-lm.fit(X_train,y_train)
-
-def truncate(f, n):
-    '''Function truncates float'''
-    s = '{}'.format(f)
-    if 'e' in s or 'E' in s:
-        return '{0:.{1}f}'.format(f, n)
-    i, p, d = s.partition('.')
-    return '.'.join([i, (d+'0'*n)[:n]])
-
-# Create predictions and plot outcome
-pred = lm.predict(X_test)
-from decimal import Decimal
-error_1 = ((np.array(y_test) - pred)**2).sum()
-print('\n\nLINEAR REGRESSION RESULTS')
-print('------------------------------------------------------------------')
-print('\nPredictors with large p values were removed from the analysis using backward elimination.')
-print('\nFor linear regression using all estimators, the root mean squared error is :', ('%.2E' % Decimal(error_1)), '.\n')
-
-# Calculate mean error
-abs_error = np.absolute(np.array(y_test) - pred)
-abs_err_mean = abs_error.mean()
-abs_err_median = np.median(abs_error)
-
-abs_err_mean_pct = (abs_error/np.array(y_test)).mean()*100
-abs_err_median_pct = np.median((abs_error/np.array(y_test)))*100
-
-print('The mean hourly pay error of this model is $', truncate(abs_err_mean,2), ' while the median pay error is $', truncate(abs_err_median,2), '.\n\n')
-print('This represents a mean hourly pay error of ', truncate(abs_err_mean/y_test.mean()*100,1),'% and a median pay error of ', truncate(abs_err_median_pct,1),'%')
-
-# Check Linear Regression Statistics
-import statsmodels.formula.api as sm
-X_opt = X
-regressor_OLS = sm.OLS(endog = y, exog = X_opt).fit()
-print('Statistical Summary: \n', regressor_OLS.summary(), '\n\n')
-
-# Plot Actual Salary v Predicted Salary - Linear Regression
-print('\nLINEAR REGRESSION RESULTS PLOT - Actual Hourly Pay v Predicted Pay')
-plt.figure(figsize = (6,6))
-plt.scatter(y_test, pred)
-plt.plot(range(0,500), ls = '--', c = 'k')
-plt.xlabel('Actual Hourly Pay [$]')
-plt.ylabel('Predicted Hourly Pay [$]')
-plt.xlim(1, 500)
-plt.ylim(1, 500)
-plt.title('Linear Regression Results')
-plt.show()
-plt.clf()
-ax.clear()
-
-# RANDOM FOREST REGRESSION
-# Fitting SVR to the dataset
-from sklearn.ensemble import RandomForestRegressor
-rfr = RandomForestRegressor(n_estimators = 100)
-rfr.fit(X_train, y_train)
-
-# Create predictions and plot outcome of Random Forest model
-pred_rfr = rfr.predict(X_test)
-error_rfr = ((np.array(y_test) - pred_rfr)**2).sum()
-print('\n\nRANDOM FOREST REGRESSION RESULTS')
-print('------------------------------------------------------------------')
-print('\nFor Random Forest Regression, the root mean squared error is :', ('%.2E' % Decimal(error_rfr)), '.\n')
-
-# Calculate mean error
-abs_error_rfr = np.absolute(np.array(y_test) - pred_rfr)
-abs_err_rfr_mean = abs_error_rfr.mean()
-abs_err_rfr_median = np.median(abs_error_rfr)
-
-abs_err_rfr_mean_pct = (abs_error_rfr/np.array(y_test)).mean()*100
-abs_err_rfr_median_pct = np.median((abs_error_rfr/np.array(y_test)))*100
-
-
-print('The mean hourly pay error of this model is $', truncate(abs_err_rfr_mean,2), ' while the median pay error is $', truncate(abs_err_rfr_median,2), '.\n\n')
-print('This represents a mean hourly pay error of ', truncate(abs_err_rfr_mean/y_test.mean()*100,1),'% and a median pay error of ', truncate(abs_err_rfr_median_pct,1),'%')
-# Plot Actual Salary v Predicted Salary - Random Forest Regression
-print('\nRANDOM FOREST REGRESSION RESULTS PLOT - Actual Hourly Pay v Predicted Pay')
-plt.figure(figsize = (6,6))
-plt.scatter(y_test, pred_rfr)
-plt.plot(range(0,500), ls = '--', c = 'k')
-plt.xlabel('Actual Hourly Pay [$]')
-plt.ylabel('Predicted Hourly Pay [$]')
-plt.xlim(1, 500)
-plt.ylim(1, 500)
-plt.title('Random Forest Regression Results')
-plt.show()
-plt.clf()
-ax.clear()
+            df_an = featurize(load(csv, timer), timer = timer)
+        X, columns, y = predictors(df_an, timer)
+        models, _ = train(X, y, columns, engines = ['linear_regression'], timer = timer)
+        difference = coefficient_difference(lm, models['linear_regression'])
+        print('Largest coefficient difference from the in-memory fit: %.3g (tolerance %.3g)'
+              % (difference, tolerance))
+        if difference > tolerance:
+            raise ValueError('Out-of-core coefficients differ from the in-memory fit by %.3g' % difference)
+
+    models_dir = models_dir or os.path.join(DEFAULT_MODEL_DIR, 'out_of_core')
+    save_models({'linear_regression': lm}, feature_columns(), models_dir,
+                metadata = {'training_seconds': timer.seconds, 'backward_elimination': elimination,
+                            'chunks': chunks, 'coefficient_difference': difference})
+    timer.report()
+    return lm
+
+
+def _featurize_command(args):
+    import features
+    features.main([args.csv, args.store, '--chunksize', str(args.chunksize), '--jobs', str(args.jobs)])
+
+
+def _matrix_command(args):
+    import matrix_store
+    source = ['--store', args.store] if args.store else ['--csv', args.csv, '--chunksize', str(args.chunksize)]
+    matrix_store.main(source + [args.out])
+
+
+def _plot_command(args):
+    if args.summaries or args.store or args.matrix:
+        import plots
+        if args.store:
+            source = [args.store]
+        else:
+            source = ['--matrix', args.matrix] if args.matrix else ['--summaries', args.summaries]
+        plots.main(source + ['--out', args.out, '--jobs', str(args.jobs)])
+    else:
+        plot(featurize(load(args.csv)), args.out, args.jobs)
+
+
+def _predict_command(args):
+    import predict_hourly_pay
+    argv = [args.csv, '--models', args.models] + (['-o', args.output] if args.output else [])
+    for name in args.names or []:
+        argv += ['--model', name]
+    predict_hourly_pay.main(argv)
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Infer hourly pay of State of Iowa employees.')
+    commands = parser.add_subparsers(dest = 'command')
+
+    run_parser = commands.add_parser('run', help = 'load, featurize, plot, train, evaluate and save (default)')
+    run_parser.add_argument('--csv', default = DATA_FILE, help = 'Salary Book CSV')
+    run_parser.add_argument('--models', help = 'directory for the saved models')
+    run_parser.add_argument('--cross-validation', action = 'store_true',
+                            help = 'cross-validate the configurations in cross_validation.DEFAULT_GRID')
+    run_parser.add_argument('--time-split', action = 'store_true',
+                            help = 'train on fiscal years up to N and test on year N + 1')
+
+    featurize_parser = commands.add_parser('featurize', help = 'featurize a CSV in chunks into a feature store')
+    featurize_parser.add_argument('csv', help = 'Salary Book CSV')
+    featurize_parser.add_argument('store', help = 'feature store directory')
+    featurize_parser.add_argument('--chunksize', type = int, default = 100000, help = 'rows read per chunk')
+    featurize_parser.add_argument('--jobs', type = int, default = 1, help = 'worker processes building chunks')
+
+    linear_parser = commands.add_parser('train-linear', help = 'fit the linear model one chunk at a time')
+    linear_source = linear_parser.add_mutually_exclusive_group()
+    linear_source.add_argument('--csv', default = DATA_FILE, help = 'Salary Book CSV, featurized as it is read')
+    linear_source.add_argument('--store', help = 'feature store directory (see the featurize subcommand)')
+    linear_parser.add_argument('--chunksize', type = int, default = 100000, help = 'CSV rows read per chunk')
+    linear_parser.add_argument('--models', help = 'directory for the saved model (default: models/out_of_core)')
+    linear_parser.add_argument('--check', action = 'store_true', help = 'compare with the in-memory fit')
+    linear_parser.add_argument('--tolerance', type = float, default = 1e-6,
+                               help = 'largest coefficient difference accepted by --check')
+
+    matrix_parser = commands.add_parser('matrix', help = 'write the predictors to a memory-mapped matrix store')
+    matrix_source = matrix_parser.add_mutually_exclusive_group(required = True)
+    matrix_source.add_argument('--csv', help = 'Salary Book CSV, featurized as it is read')
+    matrix_source.add_argument('--store', help = 'feature store directory (see the featurize subcommand)')
+    matrix_parser.add_argument('out', nargs = '?', default = MATRIX_DIR, help = 'matrix store directory')
+    matrix_parser.add_argument('--chunksize', type = int, default = 100000, help = 'CSV rows read per chunk')
+
+    plot_parser = commands.add_parser('plot', help = 'render the boxplots')
+    source = plot_parser.add_mutually_exclusive_group()
+    source.add_argument('--csv', default = DATA_FILE, help = 'Salary Book CSV')
+    source.add_argument('--store', help = 'feature store directory')
+    source.add_argument('--matrix', help = 'matrix store directory (see the matrix subcommand)')
+    source.add_argument('--summaries', help = 'saved boxplot summary JSON')
+    plot_parser.add_argument('--out', default = PLOT_DIR, help = 'directory for the figures')
+    plot_parser.add_argument('--jobs', type = int, default = PLOT_JOBS, help = 'processes rendering figures')
+
+    predict_parser = commands.add_parser('predict', help = 'score Salary Book rows with saved models')
+    predict_parser.add_argument('csv', help = 'CSV with Position, Department and Gender columns')
+    predict_parser.add_argument('-o', '--output', help = 'output CSV (default: standard output)')
+    predict_parser.add_argument('--models', default = 'models', help = 'directory of saved models')
+    predict_parser.add_argument('--model', action = 'append', dest = 'names', help = 'model to use (default: all)')
+
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    if args.command == 'featurize':
+        _featurize_command(args)
+    elif args.command == 'train-linear':
+        train_linear_out_of_core(args.csv, args.store, args.chunksize, args.models, args.check, args.tolerance)
+    elif args.command == 'matrix':
+        _matrix_command(args)
+    elif args.command == 'plot':
+        _plot_command(args)
+    elif args.command == 'predict':
+        _predict_command(args)
+    elif args.command == 'run':
+        run(args.csv, args.cross_validation, args.time_split, args.models)
+    else:
+        run()
+
+
+if __name__ == '__main__':
+    main()
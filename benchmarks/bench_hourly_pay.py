@@ -0,0 +1,55 @@
+"""Benchmark the vectorized Base Salary parser against the original row-wise
+apply and check that both give the same hourly pay for every row.
+
+CSV may also be a synthetic scale of run_benchmarks.py (100k, 1M or 10M).
+
+Usage: python benchmarks/bench_hourly_pay.py [CSV] [REPEAT]"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from run_benchmarks import SCALES, data_path
+from salary_parser import hourly_sal, parse_hourly_pay
+
+
+def best_time(func, repeat):
+    '''Function returns the fastest wall time of several calls and the result'''
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main(path='State_of_Iowa_Salary_Book_Excerpt.csv', repeat=3):
+    if path in SCALES:
+        path = data_path(path)
+    df = pd.read_csv(path, usecols=['Base Salary', 'Total Salary Paid'])
+    cols = df[['Base Salary', 'Total Salary Paid']]
+
+    t_apply, expected = best_time(lambda: cols.apply(hourly_sal, axis=1), repeat)
+    t_vector, result = best_time(
+        lambda: parse_hourly_pay(df['Base Salary'], df['Total Salary Paid']), repeat)
+
+    expected = expected.to_numpy(dtype=float, na_value=np.nan)
+    mismatched = ~((expected == result.to_numpy()) | (np.isnan(expected) & result.isnull().to_numpy()))
+    print('Rows:                 ', len(df))
+    print('Row-wise apply [s]:   ', '%.4f' % t_apply)
+    print('Vectorized parser [s]:', '%.4f' % t_vector)
+    print('Speedup:              ', '%.1fx' % (t_apply / t_vector))
+    print('Mismatched rows:      ', int(mismatched.sum()))
+    return int(mismatched.sum())
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    path = args[0] if args else 'State_of_Iowa_Salary_Book_Excerpt.csv'
+    repeat = int(args[1]) if len(args) > 1 else 3
+    sys.exit(1 if main(path, repeat) else 0)
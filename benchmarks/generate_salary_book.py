@@ -0,0 +1,148 @@
+"""Generate synthetic CSVs in the State of Iowa Salary Book schema.
+
+Rows have the columns of the published Salary Book. Each Position has a typical
+hourly rate that varies by employee and grows about 2% per fiscal year
+(2007-2017); the rate is written as Base Salary in the free-text formats of the
+real file ('$52,000 YR', '18.50 HR', '1,900 BW', '$1,900.00/BW'), with some
+'TERMINATED', blank and malformed values. Position titles cover the words the
+position tags look for and Departments include every department with an
+indicator column, so every feature and model stage gets realistic work.
+Output is written in chunks, so files of 10M rows need little memory.
+
+Usage: python benchmarks/generate_salary_book.py ROWS OUT_CSV [--seed N]"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['Fiscal Year', 'Department', 'Agency/Institution', 'Name', 'Gender', 'Place of Residence',
+           'Position', 'Base Salary', 'Base Salary Date', 'Total Salary Paid', 'Travel & Subsistence']
+
+FISCAL_YEARS = np.arange(2007, 2018)
+
+# Position title -> typical hourly rate in 2007 dollars
+POSITIONS = {
+    'Head Coach': 150.0, 'Assistant Coach': 38.0, 'Professor': 58.0, 'Assoc Professor': 46.0,
+    'Asst Professor': 41.0, 'Adjunct Instructor': 28.0, 'Clinical Assoc Prof': 60.0, 'President': 160.0,
+    'Vice President': 95.0, 'Assoc Vice President': 75.0, 'Dean': 100.0, 'Assoc Dean': 70.0,
+    'Staff Physician': 115.0, 'Attorney 2': 44.0, 'Asst Attorney General 3': 50.0,
+    'Transportation Engineer': 39.0, 'Engineer III': 42.0, 'Exec Officer 2': 34.0,
+    'Executive Director': 80.0, 'Lottery Sales Rep': 24.0, 'Grad Asst': 15.0, 'Scholar/Trainee': 12.0,
+    'Storekeeper': 20.0, 'Chief Of Staff': 70.0, 'Police Chief': 48.0, 'Director Of Athletics': 130.0,
+    'Program Director': 45.0, 'Dir Of Finance': 60.0, 'Secretary 2': 20.0, 'Admin Asst 2': 22.0,
+    'Administrative Assistant': 23.0, 'Custodian': 17.0, 'Custodian I': 16.0, 'Intern': 12.0,
+    'IT Tech II': 27.0, 'Information Technology Specialist 4': 35.0, 'Network Admin': 36.0,
+    'Teacher': 30.0, 'Americorp Member': 10.0, 'Correctional Officer': 23.0, 'Maint Repairer': 22.0,
+    'Clerk Specialist': 19.0, 'Clerk IV': 21.0, 'Sergeant': 33.0, 'Athletic Trainer': 28.0,
+    'Nursing Aide': 16.0, 'Monthly Staff': 25.0, 'Research Associate': 26.0, 'Program Planner 2': 30.0,
+    'Registered Nurse': 35.0, 'Trooper 2': 32.0, 'Accountant 2': 29.0, 'Social Worker 2': 27.0,
+    'District Court Judge': 75.0, 'Legislative Aide': 22.0, 'Medical Assistant': 18.0,
+    'Equipment Operator': 21.0, 'Food Service Worker': 14.0, 'Vp Research': 110.0,
+}
+
+# Department -> share of rows
+DEPARTMENTS = {
+    'University of Iowa': 0.24, 'Iowa State University': 0.17, 'University of Northern Iowa': 0.06,
+    'Transportation, Department of': 0.07, 'Corrections, Department of': 0.07, 'Judicial Branch': 0.05,
+    'Human Services, Department of': 0.07, 'Natural Resources, Department of': 0.03,
+    'Public Safety, Department of': 0.03, 'Iowa Veterans Home': 0.02, 'Iowa Workforce Development': 0.02,
+    'Education, Department of': 0.02, 'Inspections & Appeals, Department of': 0.01,
+    'Legislative Branch': 0.02, 'Public Defense, Department of': 0.01, 'Commerce, Department of': 0.01,
+    'Administrative Services, Department of': 0.01, 'Regents, Board of': 0.01,
+    'Attorney General, Office of': 0.01, 'Public Health, Department of': 0.02,
+    'Revenue, Department of': 0.02, 'Iowa Lottery Authority': 0.01, 'Agriculture, Department of': 0.02,
+}
+
+# Base Salary format -> share of rows; amounts are per year, hour or two weeks
+BASE_SALARY_FORMATS = {
+    '$%s YR': 0.30, '%s YR': 0.12, '%s HR': 0.22, '%s/HR': 0.04, '%s BW': 0.12, '$%s/BW': 0.04,
+    'TERMINATED': 0.05, 'terminated ': 0.01, 'HR': 0.01, '20.12HR': 0.002, '262.99DA': 0.002,
+    '': 0.066,
+}
+
+RESIDENCES = ['POLK', 'JOHNSON', 'STORY', 'LINN', 'SCOTT', 'BLACK HAWK', 'DUBUQUE', 'WOODBURY', 'OUT OF STATE']
+
+
+def _pick(rng, table, n):
+    '''Function draws n keys of a {key: weight} table in proportion to the weights'''
+    keys = np.array(list(table), dtype=object)
+    weights = np.array(list(table.values()), dtype=float)
+    return rng.choice(len(keys), size=n, p=weights / weights.sum()), keys
+
+
+def _format_amounts(amounts, decimals):
+    '''Function formats amounts with thousands separators'''
+    return pd.Series(amounts).map(('{:,.%df}' % decimals).format)
+
+
+def generate_salary_book(n_rows, seed=0):
+    '''Function returns a DataFrame of n_rows synthetic Salary Book rows'''
+    rng = np.random.default_rng(seed)
+    years = rng.choice(FISCAL_YEARS, size=n_rows)
+    position, positions = _pick(rng, {title: 1.0 for title in POSITIONS}, n_rows)
+    department, departments = _pick(rng, DEPARTMENTS, n_rows)
+    fmt, formats = _pick(rng, BASE_SALARY_FORMATS, n_rows)
+
+    rates = np.array(list(POSITIONS.values()))
+    hourly = rates[position] * rng.lognormal(0.0, 0.25, n_rows) * 1.02 ** (years - FISCAL_YEARS[0])
+    # Share of the year each employee was paid for
+    paid_share = np.where(rng.random(n_rows) < 0.7, 1.0, rng.uniform(0.05, 1.0, n_rows))
+
+    base_salary = np.empty(n_rows, dtype=object)
+    for i, pattern in enumerate(formats):
+        rows = np.flatnonzero(fmt == i)
+        if '%s' not in pattern:
+            base_salary[rows] = pattern if pattern else None
+        # Amounts are rounded to pay grade steps, so values repeat as in the real file
+        elif pattern.endswith('YR'):
+            base_salary[rows] = [pattern % s for s in _format_amounts(np.round(hourly[rows] * 208) * 10, 0)]
+        elif pattern.endswith('BW'):
+            base_salary[rows] = [pattern % s for s in _format_amounts(np.round(hourly[rows] * 80), 2)]
+        else:
+            base_salary[rows] = [pattern % ('%.2f' % v) for v in np.round(hourly[rows] * 4) / 4]
+
+    gender = np.array(['M', 'F', '*', None], dtype=object)[
+        rng.choice(4, size=n_rows, p=[0.49, 0.49, 0.01, 0.01])]
+    travel = np.where(rng.random(n_rows) < 0.6, np.nan, np.round(rng.lognormal(5.5, 1.5, n_rows), 2))
+    return pd.DataFrame({
+        'Fiscal Year': years,
+        'Department': departments[department],
+        'Agency/Institution': departments[department],
+        'Name': 'EMPLOYEE, SYNTHETIC',
+        'Gender': gender,
+        'Place of Residence': np.array(RESIDENCES, dtype=object)[rng.integers(0, len(RESIDENCES), n_rows)],
+        'Position': positions[position],
+        'Base Salary': base_salary,
+        'Base Salary Date': ['07/01/%d' % (year - 1) for year in years],
+        'Total Salary Paid': np.round(hourly * 2080 * paid_share, 2),
+        'Travel & Subsistence': travel,
+    }, columns=COLUMNS)
+
+
+def write_salary_book(path, n_rows, seed=0, chunk_rows=1000000):
+    '''Function writes n_rows synthetic rows to a CSV, chunk_rows at a time'''
+    written = 0
+    chunk = 0
+    while written < n_rows:
+        rows = min(chunk_rows, n_rows - written)
+        # Each chunk has its own seed, so files of different sizes share a prefix
+        generate_salary_book(rows, seed=(seed, chunk)).to_csv(
+            path, mode='w' if chunk == 0 else 'a', header=chunk == 0, index=False)
+        written += rows
+        chunk += 1
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a synthetic Salary Book CSV.')
+    parser.add_argument('rows', type=int, help='number of rows')
+    parser.add_argument('out', help='CSV file to write')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    write_salary_book(args.out, args.rows, args.seed)
+    print('Wrote %d rows to %s' % (args.rows, args.out))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Benchmark every pipeline stage on synthetic Salary Books of several sizes.
+
+For each scale a synthetic CSV is generated once (see generate_salary_book.py)
+and cached in benchmarks/data. The pipeline then runs in a fresh process per
+scale: loading, the hourly pay parse, position tagging, department coding, row
+filtering, the predictor matrix, the boxplot summaries and the linear, random
+forest and gradient boosting fits. The wall time, CPU time and peak RSS of each
+stage are recorded with profiling.StageProfiler and compared with the stored
+baselines in benchmarks/baselines.json. A stage slower than its baseline by
+more than the tolerance (and by at least 50 ms) is reported as a regression and the exit status is 1.
+
+Baselines depend on the machine; record them with --update-baselines on the
+machine the comparisons will run on.
+
+Usage: python benchmarks/run_benchmarks.py [--scales 100k 1M 10M] [--tolerance 1.25]
+                                           [--skip STAGE ...] [--update-baselines]"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, '..'))
+sys.path.insert(0, BENCHMARK_DIR)
+
+from generate_salary_book import write_salary_book  # noqa: E402
+
+SCALES = {'100k': 100000, '1M': 1000000, '10M': 10000000}
+DATA_DIR = os.path.join(BENCHMARK_DIR, 'data')
+BASELINES = os.path.join(BENCHMARK_DIR, 'baselines.json')
+
+# Stages must also be this much slower in absolute terms to count as a
+# regression, so millisecond stages do not trip on timer noise
+MIN_REGRESSION_SECONDS = 0.05
+
+
+def data_path(scale, seed=0):
+    '''Function returns the synthetic CSV of a scale, generating it if needed'''
+    path = os.path.join(DATA_DIR, 'salary_book_%s_seed%d.csv' % (scale, seed))
+    if not os.path.exists(path):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        start = time.perf_counter()
+        write_salary_book(path + '.tmp', SCALES[scale], seed)
+        os.replace(path + '.tmp', path)
+        print('Generated %s (%d rows) in %.1f s' % (path, SCALES[scale], time.perf_counter() - start))
+    return path
+
+
+def run_pipeline(path, skip=()):
+    '''Function runs every pipeline stage on a CSV and returns the stage records'''
+    from features import build_features, design_matrix
+    from ols import NormalEquations, backward_elimination
+    from plots import BoxplotSummary
+    from profiling import StageProfiler
+    from salary_book import read_salary_book
+    from training import fit_hist_gradient_boosting, fit_random_forest
+
+    timer = StageProfiler(trace_memory=False)
+    with timer.stage('load'):
+        df = read_salary_book(path)
+    df_an = build_features(df, timer=timer)
+    del df
+    with timer.stage('predictors'):
+        X, columns = design_matrix(df_an, sparse=True)
+    y = df_an['Hourly_Pay'].to_numpy()
+    if 'boxplot summary' not in skip:
+        with timer.stage('boxplot summary'):
+            BoxplotSummary().update(df_an)
+    if 'linear regression' not in skip:
+        with timer.stage('linear regression'):
+            backward_elimination(NormalEquations(X.shape[1]).update(X, y), columns)
+    if 'hist gradient boosting' not in skip:
+        with timer.stage('hist gradient boosting'):
+            fit_hist_gradient_boosting(X, y, max_iter=100, random_state=0)
+    if 'random forest' not in skip:
+        with timer.stage('random forest'):
+            fit_random_forest(X, y, n_estimators=10, random_state=0)
+    return {'rows': len(df_an), 'stages': timer.stages}
+
+
+def compare(results, baselines, tolerance):
+    '''Function prints each stage against its baseline and returns the
+    regressed (scale, stage) pairs'''
+    from profiling import format_mb
+    regressions = []
+    print('%-6s %-24s %9s %9s %9s %7s' % ('scale', 'stage', 'wall s', 'peak MB', 'base s', 'ratio'))
+    for scale, result in results.items():
+        for stage, record in result['stages'].items():
+            baseline = baselines.get(scale, {}).get(stage)
+            ratio = record['wall_seconds'] / baseline if baseline else None
+            status = ''
+            if ratio is not None and ratio > tolerance and record['wall_seconds'] - baseline > MIN_REGRESSION_SECONDS:
+                status = 'REGRESSION'
+                regressions.append((scale, stage))
+            print(('%-6s %-24s %9.3f %s %9s %7s %s'
+                   % (scale, stage, record['wall_seconds'], format_mb(record['peak_rss_mb'], 9),
+                      '%.3f' % baseline if baseline else '-', '%.2f' % ratio if ratio else '-', status)).rstrip())
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline stages on synthetic Salary Books.')
+    parser.add_argument('--scales', nargs='+', default=['100k', '1M'], choices=list(SCALES))
+    parser.add_argument('--tolerance', type=float, default=1.25, help='slowdown ratio reported as a regression')
+    parser.add_argument('--skip', nargs='*', default=[], help='stages to leave out, e.g. "random forest"')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='also write the results to this JSON file')
+    parser.add_argument('--update-baselines', action='store_true', help='store these results as the baselines')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for scale in args.scales:
+        path = data_path(scale, args.seed)
+        # A fresh process per scale, so peak RSS is not carried over
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            results[scale] = pool.submit(run_pipeline, path, args.skip).result()
+
+    baselines = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES) as f:
+            baselines = json.load(f)
+    regressions = compare(results, baselines.get('wall_seconds', {}), args.tolerance)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'machine': platform.platform(), 'cpus': os.cpu_count(), 'results': results}, f, indent=2)
+    if args.update_baselines:
+        wall = baselines.setdefault('wall_seconds', {})
+        for scale, result in results.items():
+            wall[scale] = {stage: round(record['wall_seconds'], 4) for stage, record in result['stages'].items()}
+        baselines.update(machine=platform.platform(), cpus=os.cpu_count(), recorded=time.strftime('%Y-%m-%d'))
+        with open(BASELINES, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print('Baselines written to %s' % BASELINES)
+        return 0
+    if regressions:
+        print('%d stage(s) slower than baseline by more than %.0f%%' % (len(regressions), (args.tolerance - 1) * 100))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
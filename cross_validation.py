@@ -0,0 +1,100 @@
+"""Seeded K-fold cross-validation over model configurations.
+
+The predictor matrix and target are dumped once to a temporary directory and
+memory-mapped read-only, unless they are already memory-mapped (e.g. a
+MatrixStore, see matrix_store.py), in which case they are used as they are.
+Folds run in parallel worker processes that receive
+the memory-mapped arrays by reference instead of a pickled copy of the data.
+The result is a table with one row per configuration and the mean and
+standard deviation of the error metrics over the folds."""
+
+import os
+import shutil
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import KFold
+
+from metrics import regression_metrics
+from ols import LinearModel
+from training import make_hist_gradient_boosting
+
+# (engine, parameters) pairs evaluated by default
+DEFAULT_GRID = [
+    ('linear_regression', {}),
+    ('random_forest', {'n_estimators': 50}),
+    ('random_forest', {'n_estimators': 100}),
+    ('random_forest', {'n_estimators': 100, 'min_samples_leaf': 5}),
+    ('hist_gradient_boosting', {'max_iter': 200}),
+]
+
+
+def make_model(engine, params, seed):
+    '''Function returns an unfitted model for an engine name and parameters'''
+    if engine == 'linear_regression':
+        return LinearModel(**params)
+    if engine == 'random_forest':
+        # Folds already run in parallel, so each forest uses one core
+        return RandomForestRegressor(n_jobs=1, random_state=seed, **params)
+    if engine == 'hist_gradient_boosting':
+        return make_hist_gradient_boosting(random_state=seed, **params)
+    raise ValueError('Unknown engine: %s' % engine)
+
+
+def _run_fold(X, y, engine, params, train, test, seed):
+    '''Function fits one configuration on one fold and returns its errors'''
+    start = time.perf_counter()
+    model = make_model(engine, params, seed).fit(X[train], y[train])
+    fit_seconds = time.perf_counter() - start
+    return dict(regression_metrics(y[test], model.predict(X[test]))._asdict(), fit_seconds=fit_seconds)
+
+
+def _is_memory_mapped(array):
+    '''Function tells whether a dense array, or every array of a sparse
+    matrix, is a view of a memory-mapped file'''
+    if hasattr(array, 'indptr'):
+        return all(_is_memory_mapped(part) for part in (array.data, array.indices, array.indptr))
+    while isinstance(array, np.ndarray):
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return False
+
+
+def cross_validate_grid(X, y, grid=DEFAULT_GRID, n_splits=5, seed=0, n_jobs=-1):
+    '''Function cross-validates every (engine, parameters) pair of the grid
+
+    X may be dense or scipy.sparse. Returns a DataFrame with the mean and
+    standard deviation of each metric over the folds, one row per
+    configuration.'''
+    folds = list(KFold(n_splits=n_splits, shuffle=True, random_state=seed).split(np.arange(X.shape[0])))
+    if isinstance(X, pd.DataFrame):
+        X = X.to_numpy()
+    workdir = None
+    try:
+        if not (_is_memory_mapped(X) and _is_memory_mapped(y)):
+            # One read-only, memory-mapped copy of the data shared by every worker
+            workdir = tempfile.mkdtemp(prefix='salary_cv_')
+            path = os.path.join(workdir, 'data.joblib')
+            joblib.dump((X, np.asarray(y, dtype=np.float64)), path)
+            X, y = joblib.load(path, mmap_mode='r')
+        results = joblib.Parallel(n_jobs=n_jobs)(
+            joblib.delayed(_run_fold)(X, y, engine, params, train, test, seed)
+            for engine, params in grid for train, test in folds)
+    finally:
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    rows = []
+    for i, (engine, params) in enumerate(grid):
+        scores = pd.DataFrame(results[i * n_splits:(i + 1) * n_splits])
+        row = {'engine': engine, 'params': ', '.join('%s=%s' % item for item in sorted(params.items()))}
+        for metric in scores.columns:
+            row[metric] = scores[metric].mean()
+            row[metric + '_std'] = scores[metric].std()
+        rows.append(row)
+    return pd.DataFrame(rows)
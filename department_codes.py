@@ -0,0 +1,61 @@
+"""Indicator columns for the Salary Book 'Department' field.
+
+DEPARTMENT_COLUMNS maps the exact Department name to the name of its indicator
+column. Departments not in the table get no indicator."""
+
+import numpy as np
+import pandas as pd
+
+from vocabulary import factorize
+
+DEPARTMENT_COLUMNS = {
+    'University of Iowa': 'U_of_I',
+    'Iowa State University': 'Iowa_State',
+    'Transportation, Department of': 'DOT',
+    'Corrections, Department of': 'DOC',
+    'University of Northern Iowa': 'UNI',
+    'Judicial Branch': 'JB',
+    'Natural Resources, Department of': 'DNR',
+    'Public Safety, Department of': 'DPS',
+    'Iowa Veterans Home': 'IVH',
+    'Iowa Workforce Development': 'IWD',
+    'Education, Department of': 'DOE',
+    'Inspections & Appeals, Department of': 'DIA',
+    'Legislative Branch': 'Leg',
+    'Public Defense, Department of': 'DPD',
+    'Commerce, Department of': 'DCom',
+    'Administrative Services, Department of': 'DAS',
+    'Regents, Board of': 'BoR',
+    'Attorney General, Office of': 'AG',
+}
+
+
+def department_positions(department, columns=DEPARTMENT_COLUMNS, stats=None):
+    '''Function returns the indicator column number of each row, or -1 if the
+    row's department has no indicator column'''
+    codes, uniques = factorize(department)
+    if stats is not None:
+        stats.add('Department', uniques, len(codes))
+    names = pd.Index(list(dict.fromkeys(columns.values())))
+    # Column number of each distinct department, with a trailing -1 for nulls
+    lookup = names.get_indexer(pd.Index(uniques, dtype=object).map(columns))
+    lookup = np.append(lookup, -1)
+    return lookup[codes], names
+
+
+def encode_departments(department, columns=DEPARTMENT_COLUMNS, sparse=False, stats=None):
+    '''Function one-hot encodes a Department column
+
+    Returns a DataFrame of uint8 indicator columns, or with sparse=True a
+    (scipy.sparse.csr_matrix, column names) pair.'''
+    department = pd.Series(department)
+    position, names = department_positions(department, columns, stats)
+    rows = np.flatnonzero(position >= 0)
+    if sparse:
+        from scipy import sparse as sp
+        matrix = sp.csr_matrix((np.ones(len(rows), dtype=np.uint8), (rows, position[rows])),
+                               shape=(len(department), len(names)))
+        return matrix, list(names)
+    flags = np.zeros((len(department), len(names)), dtype=np.uint8)
+    flags[rows, position[rows]] = 1
+    return pd.DataFrame(flags, index=department.index, columns=names)
@@ -0,0 +1,64 @@
+"""On-disk store of featurized Salary Book rows.
+
+A store is a directory of part files, one per appended DataFrame, written in
+the same format as the Salary Book cache (see salary_book.py). Parts can be
+read back one at a time, so a store can hold more rows than fit in memory."""
+
+import glob
+import os
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from salary_book import frame_extension, read_frame, write_frame
+
+
+class FeatureStore:
+    '''Directory of featurized DataFrame parts'''
+
+    def __init__(self, path):
+        self.path = path
+
+    def parts(self):
+        '''Function returns the part files in the order they were appended
+
+        Temporary files left by an interrupted write_frame are not parts.'''
+        return sorted(path for path in glob.glob(os.path.join(self.path, 'part-*'))
+                      if not path.endswith('.tmp'))
+
+    def append(self, frame):
+        '''Function writes a DataFrame as the next part of the store'''
+        os.makedirs(self.path, exist_ok=True)
+        part = os.path.join(self.path, 'part-%05d%s' % (len(self.parts()), frame_extension()))
+        write_frame(frame, part)
+        return part
+
+    def clear(self):
+        '''Function removes every part, and any interrupted write, from the
+        store'''
+        for part in glob.glob(os.path.join(self.path, 'part-*')):
+            os.remove(part)
+
+    def iter_parts(self):
+        '''Function yields the parts one DataFrame at a time'''
+        for part in self.parts():
+            yield read_frame(part)
+
+    def read(self, columns=None):
+        '''Function reads the whole store into one DataFrame
+
+        Categorical columns are recombined so their categories cover every part.'''
+        frames = [frame if columns is None else frame[columns] for frame in self.iter_parts()]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return concat_frames(frames)
+
+
+def concat_frames(frames):
+    '''Function concatenates DataFrames, keeping categorical columns categorical
+    even when the parts have different categories'''
+    df = pd.concat(frames, ignore_index=True)
+    for col in frames[0].columns:
+        if isinstance(frames[0][col].dtype, pd.CategoricalDtype):
+            df[col] = union_categoricals([frame[col] for frame in frames], ignore_order=True)
+    return df
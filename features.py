@@ -0,0 +1,199 @@
+"""Row-level feature build for the Salary Book.
+
+build_features turns raw Salary Book rows into the analysis frame: hourly pay,
+Position flags, Department indicators, Travel & Subsistence with missing values
+set to zero, and the 'M' gender dummy, keeping only rows with valid hourly pay
+and a gender of M or F. stream_features runs the same build over a CSV in
+chunks and appends each chunk to a FeatureStore, so memory use is bounded by
+the chunk size rather than the size of the file.
+
+Every transform is row-level, so partitions of the data (fiscal years, row
+ranges or CSV chunks) can be built in separate processes and concatenated in
+their original order.
+
+Usage: python features.py CSV STORE_DIR [--chunksize N] [--jobs N]"""
+
+import argparse
+import collections
+import contextlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from department_codes import DEPARTMENT_COLUMNS, encode_departments
+from feature_store import FeatureStore
+from position_tags import POSITION_TAGS, tag_positions
+from salary_book import read_salary_book
+from salary_parser import parse_hourly_pay
+from vocabulary import VocabularyStats
+
+
+def build_features(df, stats=None, timer=None):
+    '''Function returns the analysis frame for a DataFrame of Salary Book rows
+
+    The optional VocabularyStats records the Position and Department
+    unique/row ratios, and the optional StageTimer (see profiling.py) records
+    the hourly pay, tagging and filtering steps as separate stages.'''
+    stage = timer.stage if timer is not None else _no_stage
+    with stage('hourly pay'):
+        hourly_pay = parse_hourly_pay(df['Base Salary'], df['Total Salary Paid'])
+    with stage('position tags'):
+        position_flags = tag_positions(df['Position'], stats=stats)
+    with stage('department codes'):
+        department_flags = encode_departments(df['Department'], stats=stats)
+    with stage('filter rows'):
+        df = pd.concat([df, hourly_pay, position_flags, department_flags], axis=1)
+        # Change Travel & Subsistence to zero if no value given
+        df['Travel & Subsistence'] = df['Travel & Subsistence'].fillna(0)
+
+        # Drop entries with no salary data or a gender other than M or F
+        df = df[(df['Hourly_Pay'] > 0).to_numpy() & df['Gender'].isin(['M', 'F']).to_numpy()]
+        male = (df['Gender'] == 'M').to_numpy(dtype=np.uint8)
+        return df.drop(['Gender'], axis=1).assign(M=male)
+
+
+def _no_stage(name):
+    return contextlib.nullcontext()
+
+
+def design_matrix(df, columns=None, sparse=False, stats=None):
+    '''Function returns the model predictors (Position flags, Department
+    indicators and M) for Salary Book rows, without dropping any rows
+
+    columns selects and orders the predictors, e.g. the feature columns saved
+    with a trained model. Returns a DataFrame of uint8 columns, or with
+    sparse=True a (scipy.sparse.csr_matrix, column names) pair built directly
+    from the category codes.'''
+    # Featurized frames already carry the M dummy in place of Gender
+    if 'M' in df:
+        male = df['M'].to_numpy(dtype=np.uint8)
+    else:
+        male = (df['Gender'] == 'M').to_numpy(dtype=np.uint8)
+    if not sparse:
+        X = pd.concat([tag_positions(df['Position'], stats=stats),
+                       encode_departments(df['Department'], stats=stats)], axis=1).assign(M=male)
+        return X if columns is None else X[columns]
+
+    from scipy import sparse as sp
+    position_flags, position_names = tag_positions(df['Position'], stats=stats, sparse=True)
+    dept_flags, dept_names = encode_departments(df['Department'], stats=stats, sparse=True)
+    X = sp.hstack([position_flags, dept_flags, sp.csr_matrix(male.reshape(-1, 1))], format='csr')
+    names = position_names + dept_names + ['M']
+    if columns is None:
+        return X, names
+    index = {name: i for i, name in enumerate(names)}
+    return X[:, [index[name] for name in columns]], list(columns)
+
+
+def feature_columns():
+    '''Function returns the names of the predictors design_matrix builds, in
+    its column order, without building a matrix'''
+    return list(POSITION_TAGS) + list(dict.fromkeys(DEPARTMENT_COLUMNS.values())) + ['M']
+
+
+def feature_matrix(df_an, columns):
+    '''Function returns the predictors of a featurized frame as a
+    scipy.sparse.csr_matrix, read from its stored flag columns instead of
+    tagging the positions again'''
+    from scipy import sparse as sp
+    return sp.csr_matrix(df_an[columns].to_numpy(dtype=np.uint8))
+
+
+def matrix_nbytes(X):
+    '''Function returns the memory used by a dense or sparse matrix in bytes'''
+    if hasattr(X, 'indptr'):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    if isinstance(X, pd.DataFrame):
+        return int(X.memory_usage(index=False).sum())
+    return np.asarray(X).nbytes
+
+
+def _build_partition(df):
+    '''Function builds one partition in a worker process and returns the
+    features with the worker's VocabularyStats'''
+    stats = VocabularyStats()
+    return build_features(df, stats), stats
+
+
+def _merge_stats(stats, partition_stats):
+    if stats is not None:
+        stats.merge(partition_stats)
+
+
+def build_features_parallel(df, n_jobs=None, partition='Fiscal Year', stats=None):
+    '''Function runs build_features over partitions of df in a process pool
+
+    partition is a column name (one partition per value, e.g. per fiscal year)
+    or 'rows' for n_jobs contiguous row ranges. Rows come back in the order of
+    df. n_jobs defaults to the number of CPUs.'''
+    if n_jobs is None:
+        n_jobs = os.cpu_count() or 1
+    # Position of each row in df, used to restore the original order
+    df = df.assign(_row=np.arange(len(df)))
+    if partition == 'rows':
+        bounds = np.linspace(0, len(df), n_jobs + 1).astype(int)
+        parts = [df.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+    else:
+        parts = [part for _, part in df.groupby(partition, observed=True, sort=True)]
+
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        results = list(pool.map(_build_partition, parts))
+    for _, partition_stats in results:
+        _merge_stats(stats, partition_stats)
+    features = pd.concat([features for features, _ in results])
+    return features.sort_values('_row', kind='stable').drop(['_row'], axis=1)
+
+
+def stream_features(path, store, chunksize=100000, stats=None, n_jobs=1):
+    '''Function featurizes a Salary Book CSV chunk by chunk into a FeatureStore
+
+    With n_jobs > 1 chunks are built in a process pool, with at most 2 * n_jobs
+    chunks in flight so memory stays bounded. Returns the number of rows
+    written.'''
+    rows = 0
+    chunks = read_salary_book(path, chunksize=chunksize)
+    if n_jobs == 1:
+        for chunk in chunks:
+            features = build_features(chunk, stats)
+            store.append(features)
+            rows += len(features)
+        return rows
+
+    pending = collections.deque()
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        for chunk in chunks:
+            pending.append(pool.submit(_build_partition, chunk))
+            while len(pending) >= 2 * n_jobs or (pending and pending[0].done()):
+                rows += _store_result(pending.popleft(), store, stats)
+        while pending:
+            rows += _store_result(pending.popleft(), store, stats)
+    return rows
+
+
+def _store_result(future, store, stats):
+    features, partition_stats = future.result()
+    _merge_stats(stats, partition_stats)
+    store.append(features)
+    return len(features)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Featurize a Salary Book CSV in chunks into a feature store.')
+    parser.add_argument('csv', help='Salary Book CSV file')
+    parser.add_argument('store', help='feature store directory')
+    parser.add_argument('--chunksize', type=int, default=100000, help='rows read per chunk')
+    parser.add_argument('--jobs', type=int, default=1, help='worker processes building chunks')
+    args = parser.parse_args(argv)
+
+    store = FeatureStore(args.store)
+    store.clear()
+    stats = VocabularyStats()
+    rows = stream_features(args.csv, store, args.chunksize, stats, args.jobs)
+    print('Wrote %d rows in %d parts to %s' % (rows, len(store.parts()), args.store))
+    stats.report()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Fiscal-year incremental updates of the linear hourly pay model.
+
+The Salary Book grows by one fiscal year at a time. For each year the state
+directory keeps the featurized rows (a FeatureStore per year) and the linear
+model's sufficient statistics X'X, X'y and y'y. When a new CSV arrives only
+its rows are parsed and tagged; the statistics of the years it contains are
+replaced, the statistics of all years are summed and the linear model is
+refitted from them (with backward elimination, as in the main script). Update
+time is proportional to the new data, not to the whole book.
+
+Layout of the state directory:
+
+    manifest.json          feature columns and years held
+    years/<year>/          featurized rows of the year (FeatureStore)
+    years/<year>.npz       NormalEquations of the year
+    model/                 refreshed linear model (see model_store.py)
+
+Usage: python incremental.py CSV [CSV ...] [--state DIR]"""
+
+import argparse
+import glob
+import json
+import os
+import time
+
+from feature_store import FeatureStore
+from features import build_features, feature_columns, feature_matrix
+from model_store import save_models
+from ols import NormalEquations, backward_elimination
+from salary_book import read_salary_book
+
+DEFAULT_STATE_DIR = 'incremental_state'
+
+
+class IncrementalState:
+    '''Per-fiscal-year feature partitions and linear model statistics'''
+
+    def __init__(self, path=DEFAULT_STATE_DIR):
+        self.path = path
+
+    def manifest(self):
+        try:
+            with open(os.path.join(self.path, 'manifest.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'feature_columns': None, 'years': []}
+
+    def years(self):
+        '''Function returns the fiscal years held in the state'''
+        return sorted(int(os.path.basename(path)[:-4])
+                      for path in glob.glob(os.path.join(self.path, 'years', '*.npz')))
+
+    def partition(self, year):
+        '''Function returns the FeatureStore holding a year's featurized rows'''
+        return FeatureStore(os.path.join(self.path, 'years', str(year)))
+
+    def equations(self, year):
+        '''Function returns the NormalEquations of one year'''
+        return NormalEquations.load(os.path.join(self.path, 'years', '%d.npz' % year))
+
+    def total_equations(self, years=None):
+        '''Function returns the NormalEquations summed over the given years
+        (default: all years)'''
+        years = self.years() if years is None else years
+        total = self.equations(years[0])
+        for year in years[1:]:
+            total += self.equations(year)
+        return total
+
+    def add_year(self, year, df_an):
+        '''Function stores a year's featurized rows and statistics, replacing
+        any earlier version of the year'''
+        # The featurized rows already carry the flag columns; read them instead
+        # of tagging the positions and departments again
+        columns = feature_columns()
+        X = feature_matrix(df_an, columns)
+        manifest = self.manifest()
+        if manifest['feature_columns'] not in (None, columns):
+            raise ValueError('Feature columns differ from the stored years; '
+                             'rebuild the state directory after changing the tag tables')
+        store = self.partition(year)
+        store.clear()
+        store.append(df_an)
+        NormalEquations(X.shape[1]).update(X, df_an['Hourly_Pay']).save(
+            os.path.join(self.path, 'years', '%d.npz' % year))
+        manifest['feature_columns'] = columns
+        manifest['years'] = self.years()
+        with open(os.path.join(self.path, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+
+def update(csv, state, significance=0.05):
+    '''Function adds the fiscal years in a Salary Book CSV to the state and
+    refits the linear model from the statistics of every year
+
+    Returns the refreshed model and the seconds spent per stage.'''
+    seconds = {}
+    start = time.perf_counter()
+    df_an = build_features(read_salary_book(csv))
+    seconds['featurize'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for year, rows in df_an.groupby('Fiscal Year', sort=True):
+        state.add_year(int(year), rows)
+    seconds['store years'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns = state.manifest()['feature_columns']
+    model, elimination = backward_elimination(state.total_equations(), columns, significance)
+    save_models({'linear_regression': model}, columns, os.path.join(state.path, 'model'),
+                metadata={'years': state.years(), 'backward_elimination': elimination})
+    seconds['refit'] = time.perf_counter() - start
+    return model, seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Add fiscal years to the incremental linear model.')
+    parser.add_argument('csv', nargs='+', help='Salary Book CSV files with new fiscal years')
+    parser.add_argument('--state', default=DEFAULT_STATE_DIR, help='state directory')
+    args = parser.parse_args(argv)
+
+    state = IncrementalState(args.state)
+    for csv in args.csv:
+        model, seconds = update(csv, state)
+        print('%s: years held %s, %d rows in model' % (csv, state.years(), model.nobs))
+        for stage, value in seconds.items():
+            print('    %-12s %8.2f s' % (stage, value))
+
+
+if __name__ == '__main__':
+    main()
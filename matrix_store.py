@@ -0,0 +1,183 @@
+"""Memory-mapped on-disk store of the finished predictor matrix and target.
+
+The sparse predictor matrix (CSR), hourly pay and fiscal year of every row are
+written once to raw binary files next to a manifest.json recording the feature
+columns, the shape and the dtype of each file. Opening the store maps the
+files read-only: the csr_matrix and arrays it returns are views of the page
+cache, not copies, so several processes (cross-validation workers, plotting
+jobs, repeated runs) share one copy of the dataset. joblib passes the views to
+its worker processes by reference.
+
+The store can be written in one go from an in-memory matrix or appended to
+chunk by chunk (e.g. from the parts of a FeatureStore), so the full matrix
+never needs to be in memory. rows(start, stop) returns a contiguous range of
+rows, again without copying the values; writing the rows in train/test order
+makes the two sets contiguous ranges.
+
+Usage: python matrix_store.py (--csv CSV | --store STORE_DIR) OUT_DIR [--chunksize N]"""
+
+import argparse
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+DEFAULT_MATRIX_DIR = 'feature_matrix'
+MANIFEST = 'manifest.json'
+
+# File -> dtype. Flags are 0/1, so the CSR values fit in one byte; indices and
+# indptr share a dtype so scipy keeps the mapped arrays instead of converting.
+DTYPES = {'data': 'uint8', 'indices': 'int32', 'indptr': 'int32', 'y': 'float64', 'fiscal_year': 'int16'}
+
+
+class MatrixStoreWriter:
+    '''Appends featurized rows to a new matrix store
+
+    An existing directory is replaced only if it is empty or holds a previous
+    matrix store; anything else raises ValueError.'''
+
+    def __init__(self, directory, feature_columns):
+        self.directory = directory
+        self.feature_columns = list(feature_columns)
+        self.rows = 0
+        self.nnz = 0
+        if os.path.exists(directory):
+            _check_replaceable(directory)
+            shutil.rmtree(directory)
+        os.makedirs(directory)
+        self.files = {name: open(os.path.join(directory, name + '.bin'), 'wb') for name in DTYPES}
+        np.zeros(1, dtype=DTYPES['indptr']).tofile(self.files['indptr'])
+
+    def append(self, X, y, fiscal_year):
+        '''Function appends the rows of a csr_matrix with their hourly pay and
+        fiscal year'''
+        X = sparse.csr_matrix(X)
+        if X.shape[1] != len(self.feature_columns):
+            raise ValueError('Expected %d columns, got %d' % (len(self.feature_columns), X.shape[1]))
+        if self.nnz + X.nnz > np.iinfo(DTYPES['indices']).max:
+            raise ValueError('Too many non-zero values for %s indices' % DTYPES['indices'])
+        X.data.astype(DTYPES['data']).tofile(self.files['data'])
+        X.indices.astype(DTYPES['indices']).tofile(self.files['indices'])
+        (X.indptr[1:].astype(np.int64) + self.nnz).astype(DTYPES['indptr']).tofile(self.files['indptr'])
+        np.asarray(y, dtype=DTYPES['y']).tofile(self.files['y'])
+        np.asarray(fiscal_year, dtype=DTYPES['fiscal_year']).tofile(self.files['fiscal_year'])
+        self.rows += X.shape[0]
+        self.nnz += X.nnz
+        return self
+
+    def append_frame(self, df_an):
+        '''Function appends a featurized DataFrame, reading its stored flag
+        columns'''
+        from features import feature_matrix
+        return self.append(feature_matrix(df_an, self.feature_columns), df_an['Hourly_Pay'], df_an['Fiscal Year'])
+
+    def close(self, metadata=None):
+        '''Function finishes the store by writing its manifest, with optional
+        metadata such as the number of training rows, and returns the opened
+        MatrixStore'''
+        for f in self.files.values():
+            f.close()
+        manifest = {'feature_columns': self.feature_columns, 'shape': [self.rows, len(self.feature_columns)],
+                    'nnz': self.nnz, 'dtypes': DTYPES, 'metadata': metadata or {}}
+        # The manifest is written last, so an interrupted write leaves no store
+        with open(os.path.join(self.directory, MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        return MatrixStore(self.directory)
+
+
+def _check_replaceable(directory):
+    '''Function raises ValueError unless directory is empty or holds only a
+    matrix store, so writing a store never deletes other files'''
+    known = {MANIFEST} | {name + '.bin' for name in DTYPES}
+    entries = set(os.listdir(directory)) if os.path.isdir(directory) else None
+    if entries is None or (entries and (MANIFEST not in entries or entries - known)):
+        raise ValueError('%s exists and is not a matrix store; refusing to replace it' % directory)
+
+
+def write_matrix_store(directory, X, y, fiscal_year, feature_columns, metadata=None):
+    '''Function writes an in-memory matrix to a new store and returns it opened'''
+    return MatrixStoreWriter(directory, feature_columns).append(X, y, fiscal_year).close(metadata)
+
+
+class MatrixStore:
+    '''Read-only memory-mapped view of a matrix store'''
+
+    def __init__(self, directory=DEFAULT_MATRIX_DIR):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        self.feature_columns = self.manifest['feature_columns']
+        self.shape = tuple(self.manifest['shape'])
+        self.metadata = self.manifest.get('metadata', {})
+        arrays = {name: self._map(name, dtype) for name, dtype in self.manifest['dtypes'].items()}
+        self.X = sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                                   shape=self.shape, copy=False)
+        self.y = arrays['y']
+        self.fiscal_year = arrays['fiscal_year']
+
+    def _map(self, name, dtype):
+        path = os.path.join(self.directory, name + '.bin')
+        if not os.path.getsize(path):
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r')
+
+    def rows(self, start, stop):
+        '''Function returns rows start to stop as (X, y), views of the mapped
+        files; only the row pointers of X are copied'''
+        indptr = self.X.indptr[start:stop + 1]
+        X = sparse.csr_matrix((self.X.data[indptr[0]:indptr[-1]], self.X.indices[indptr[0]:indptr[-1]],
+                               np.asarray(indptr - indptr[0])), shape=(stop - start, self.shape[1]), copy=False)
+        return X, self.y[start:stop]
+
+    def frame(self, columns=(), start=0, stop=None):
+        '''Function returns a DataFrame with Hourly_Pay, Fiscal Year and the
+        given predictor columns of rows start to stop, e.g. for plotting; only
+        those columns are materialized'''
+        stop = self.shape[0] if stop is None else stop
+        index = {name: i for i, name in enumerate(self.feature_columns)}
+        # Hourly_Pay and Fiscal Year are always included
+        columns = [name for name in columns if name in index]
+        X, y = self.rows(start, stop)
+        df = pd.DataFrame({'Hourly_Pay': y, 'Fiscal Year': self.fiscal_year[start:stop]})
+        if columns:
+            flags = X[:, [index[name] for name in columns]].toarray()
+            for i, name in enumerate(columns):
+                df[name] = flags[:, i].astype(np.uint8)
+        return df
+
+    def iter_frames(self, columns=(), block_rows=1000000):
+        '''Function yields frame(columns) one block of rows at a time'''
+        for start in range(0, self.shape[0], block_rows):
+            yield self.frame(columns, start, min(start + block_rows, self.shape[0]))
+
+
+def main(argv=None):
+    from feature_store import FeatureStore
+    from features import build_features, feature_columns
+    from salary_book import read_salary_book
+
+    parser = argparse.ArgumentParser(description='Write the predictor matrix to a memory-mapped store.')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--csv', help='Salary Book CSV, featurized chunk by chunk')
+    source.add_argument('--store', help='feature store directory (see features.py)')
+    parser.add_argument('out', nargs='?', default=DEFAULT_MATRIX_DIR, help='matrix store directory')
+    parser.add_argument('--chunksize', type=int, default=100000, help='CSV rows read per chunk')
+    args = parser.parse_args(argv)
+
+    if args.store:
+        frames = FeatureStore(args.store).iter_parts()
+    else:
+        frames = (build_features(chunk) for chunk in read_salary_book(args.csv, chunksize=args.chunksize))
+    writer = MatrixStoreWriter(args.out, feature_columns())
+    for df_an in frames:
+        writer.append_frame(df_an)
+    store = writer.close()
+    print('Wrote %d rows x %d columns (%d non-zero) to %s'
+          % (store.shape[0], store.shape[1], store.manifest['nnz'], args.out))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""Error metrics of the hourly pay models.
+
+regression_metrics computes the sum of squared errors, root mean squared
+error, mean and median absolute error and mean and median absolute percentage
+error of a set of predictions. It converts the inputs to float64 once and
+reuses two work arrays (the absolute errors and the percentage errors) for
+every statistic. The medians are taken in place once the means are known."""
+
+import collections
+
+import numpy as np
+
+
+class RegressionMetrics(collections.namedtuple(
+        'RegressionMetrics', ['sse', 'rmse', 'mae', 'median_ae', 'mape', 'median_ape'])):
+    '''Errors of a set of predictions; percentages are in percent'''
+
+    __slots__ = ()
+
+    def report(self):
+        '''Function returns the metrics as printable lines'''
+        return ('The root mean squared error is $%.2f (sum of squared errors %.2E).\n'
+                'The mean hourly pay error of this model is $%.2f while the median pay error is $%.2f.\n'
+                'This represents a mean hourly pay error of %.1f%% and a median pay error of %.1f%%.'
+                % (self.rmse, self.sse, self.mae, self.median_ae, self.mape, self.median_ape))
+
+
+def regression_metrics(y_true, y_pred):
+    '''Function returns the RegressionMetrics of predictions y_pred of y_true'''
+    y_true = np.asarray(y_true, dtype=np.float64)
+    error = np.subtract(y_true, np.asarray(y_pred, dtype=np.float64))
+    sse = float(error @ error)
+    np.absolute(error, out=error)
+    pct = np.divide(error, y_true)
+    mae = error.mean()
+    mape = pct.mean() * 100
+    # Means first: the in-place medians reorder the work arrays
+    return RegressionMetrics(sse=sse, rmse=np.sqrt(sse / len(error)), mae=float(mae),
+                             median_ae=float(np.median(error, overwrite_input=True)),
+                             mape=float(mape),
+                             median_ape=float(np.median(pct, overwrite_input=True)) * 100)
@@ -0,0 +1,44 @@
+"""Saving and loading of trained hourly pay models.
+
+Each model is written with joblib, uncompressed so that its numpy arrays can
+be memory-mapped on load, next to a manifest.json that records the exact
+feature columns (and their order) the models were trained on."""
+
+import json
+import os
+
+import joblib
+
+DEFAULT_MODEL_DIR = 'models'
+MANIFEST = 'manifest.json'
+
+
+def save_models(models, feature_columns, directory=DEFAULT_MODEL_DIR, metadata=None):
+    '''Function saves a {name: fitted model} dictionary with its feature columns'''
+    os.makedirs(directory, exist_ok=True)
+    manifest = {'feature_columns': list(feature_columns), 'models': {}}
+    manifest.update(metadata or {})
+    for name, model in models.items():
+        filename = name + '.joblib'
+        joblib.dump(model, os.path.join(directory, filename))
+        manifest['models'][name] = filename
+    with open(os.path.join(directory, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest(directory=DEFAULT_MODEL_DIR):
+    '''Function reads the manifest of a model directory'''
+    with open(os.path.join(directory, MANIFEST)) as f:
+        return json.load(f)
+
+
+def load_models(directory=DEFAULT_MODEL_DIR, names=None, mmap_mode='r'):
+    '''Function loads saved models, memory-mapping their arrays where possible
+
+    Returns ({name: model}, manifest).'''
+    manifest = load_manifest(directory)
+    names = list(manifest['models']) if names is None else names
+    models = {name: joblib.load(os.path.join(directory, manifest['models'][name]), mmap_mode=mmap_mode)
+              for name in names}
+    return models, manifest
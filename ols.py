@@ -0,0 +1,267 @@
+"""Ordinary least squares from a single factorization of the normal equations.
+
+LinearModel accumulates X'X, X'y and y'y (dense or scipy.sparse X, in row
+blocks so uint8 indicator columns are never copied to float64 all at once),
+factorizes X'X once with a Cholesky decomposition and uses that factorization
+for the coefficients, their standard errors and p-values. The same fitted model
+is used for prediction and for the statistical summary. X'X falls back to a
+pseudo-inverse, like statsmodels, when some predictors are collinear or never
+set.
+
+backward_elimination repeatedly removes the predictor with the largest p-value.
+Removing a predictor deletes a column of the Cholesky factor and restores its
+triangular form with Givens rotations, so no step refactorizes X'X or touches
+the data again."""
+
+import numpy as np
+import pandas as pd
+from scipy import linalg, sparse
+
+BLOCK_ROWS = 65536
+
+
+class NormalEquations:
+    '''Sufficient statistics X'X, X'y, y'y and row count of a linear model
+
+    With fit_intercept=True a constant column is prepended to X.'''
+
+    def __init__(self, n_features, fit_intercept=True):
+        k = n_features + int(fit_intercept)
+        self.fit_intercept = fit_intercept
+        self.xtx = np.zeros((k, k))
+        self.xty = np.zeros(k)
+        self.yty = 0.0
+        self.n = 0
+
+    def update(self, X, y):
+        '''Function adds the rows of X and y to the statistics'''
+        y = np.asarray(y, dtype=np.float64)
+        if sparse.issparse(X):
+            # Row slices of a CSR matrix are cheap, and a memory-mapped matrix
+            # (see matrix_store.py) is only paged in one block at a time
+            X = sparse.csr_matrix(X, copy=False)
+        else:
+            X = np.asarray(X)
+        for start in range(0, X.shape[0], BLOCK_ROWS):
+            stop = start + BLOCK_ROWS
+            self._add(X[start:stop].astype(np.float64), y[start:stop])
+        return self
+
+    def _add(self, X, y):
+        xtx = X.T @ X
+        xty = X.T @ y
+        if sparse.issparse(xtx):
+            xtx = xtx.toarray()
+        xty = np.asarray(xty).ravel()
+        if self.fit_intercept:
+            col_sums = np.asarray(X.sum(axis=0)).ravel()
+            self.xtx[0, 0] += X.shape[0]
+            self.xtx[0, 1:] += col_sums
+            self.xtx[1:, 0] += col_sums
+            self.xtx[1:, 1:] += xtx
+            self.xty[0] += y.sum()
+            self.xty[1:] += xty
+        else:
+            self.xtx += xtx
+            self.xty += xty
+        self.yty += float(y @ y)
+        self.n += X.shape[0]
+
+    def subset(self, index):
+        '''Function returns the statistics restricted to the given columns
+        (positions in xtx, including the constant when fit_intercept is set)'''
+        equations = NormalEquations(0, fit_intercept=False)
+        equations.fit_intercept = self.fit_intercept
+        equations.xtx = self.xtx[np.ix_(index, index)]
+        equations.xty = self.xty[index]
+        equations.yty = self.yty
+        equations.n = self.n
+        return equations
+
+    def save(self, path):
+        '''Function writes the statistics to an .npz file'''
+        np.savez(path, xtx=self.xtx, xty=self.xty, yty=self.yty, n=self.n,
+                 fit_intercept=self.fit_intercept)
+
+    @classmethod
+    def load(cls, path):
+        '''Function reads statistics written by save'''
+        with np.load(path) as data:
+            equations = cls(0, fit_intercept=False)
+            equations.fit_intercept = bool(data['fit_intercept'])
+            equations.xtx = data['xtx']
+            equations.xty = data['xty']
+            equations.yty = float(data['yty'])
+            equations.n = int(data['n'])
+        return equations
+
+    def __iadd__(self, other):
+        self.xtx += other.xtx
+        self.xty += other.xty
+        self.yty += other.yty
+        self.n += other.n
+        return self
+
+
+class LinearModel:
+    '''Least squares linear regression with coefficient statistics'''
+
+    def __init__(self, fit_intercept=True):
+        self.fit_intercept = fit_intercept
+        # Positions of the predictors used, when the model was fitted on a
+        # subset of the columns of X (see backward_elimination)
+        self.feature_index = None
+
+    def fit(self, X, y, columns=None):
+        '''Function fits the model to a dense or sparse X
+
+        columns names the predictors in the summary (default: the DataFrame
+        columns of X).'''
+        if columns is None and isinstance(X, pd.DataFrame):
+            columns = list(X.columns)
+        equations = NormalEquations(X.shape[1], self.fit_intercept).update(X, y)
+        return self.fit_normal_equations(equations, columns)
+
+    def fit_normal_equations(self, equations, columns=None):
+        '''Function fits the model from accumulated NormalEquations'''
+        k = equations.xtx.shape[0]
+        self.columns = columns if columns is not None else ['x%d' % i for i in range(k - int(self.fit_intercept))]
+        try:
+            factor = linalg.cho_factor(equations.xtx)
+            beta = linalg.cho_solve(factor, equations.xty)
+            xtx_inv = linalg.cho_solve(factor, np.eye(k))
+            self.rank = k
+        except linalg.LinAlgError:
+            xtx_inv = np.linalg.pinv(equations.xtx, hermitian=True)
+            beta = xtx_inv @ equations.xty
+            self.rank = np.linalg.matrix_rank(equations.xtx, hermitian=True)
+
+        self.nobs = equations.n
+        self.df_resid = self.nobs - self.rank
+        self.ssr = max(equations.yty - beta @ equations.xty, 0.0)
+        y_mean = equations.xty[0] / self.nobs if self.fit_intercept else 0.0
+        self.centered_tss = equations.yty - self.nobs * y_mean ** 2
+        self.rsquared = 1 - self.ssr / self.centered_tss if self.centered_tss else np.nan
+        self.sigma2 = self.ssr / self.df_resid if self.df_resid > 0 else np.nan
+
+        self.params = beta
+        self.bse = np.sqrt(np.clip(np.diag(xtx_inv), 0, None) * self.sigma2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.tvalues = beta / self.bse
+        self.pvalues = _t_pvalues(self.tvalues, self.df_resid)
+        self.intercept_ = beta[0] if self.fit_intercept else 0.0
+        self.coef_ = beta[1:] if self.fit_intercept else beta
+        return self
+
+    def predict(self, X):
+        '''Function returns predictions for a dense or sparse X'''
+        if self.feature_index is not None:
+            X = X.iloc[:, self.feature_index] if isinstance(X, pd.DataFrame) else X[:, self.feature_index]
+        if sparse.issparse(X):
+            return np.asarray(X @ self.coef_).ravel() + self.intercept_
+        return np.asarray(X, dtype=np.float64) @ self.coef_ + self.intercept_
+
+    def summary(self):
+        '''Function returns the coefficient table with standard errors,
+        t statistics and p-values'''
+        names = (['const'] if self.fit_intercept else []) + list(self.columns)
+        table = pd.DataFrame({'coef': self.params, 'std err': self.bse,
+                              't': self.tvalues, 'P>|t|': self.pvalues}, index=names)
+        header = ('OLS Regression Results\n'
+                  'No. Observations: %d    Df Residuals: %d    R-squared: %.3f\n'
+                  % (self.nobs, self.df_resid, self.rsquared))
+        return header + table.to_string(float_format=lambda v: '%.4f' % v)
+
+
+def backward_elimination(equations, columns, significance=0.05):
+    '''Function removes predictors one at a time, largest p-value first, until
+    every remaining p-value is at most significance
+
+    Returns the LinearModel fitted on the selected predictors and a log with
+    the p-value trajectory and the final subset.'''
+    names = (['const'] if equations.fit_intercept else []) + list(columns)
+    first = int(equations.fit_intercept)
+    active = list(range(len(names)))
+    steps = []
+
+    # Predictors that are never set cannot be estimated at all
+    for i in [i for i in active[first:] if equations.xtx[i, i] == 0]:
+        active.remove(i)
+        steps.append({'dropped': names[i], 'p_value': None, 'reason': 'never set'})
+    current = equations.subset(active)
+    factor = _upper_cholesky(current.xtx)
+
+    while True:
+        pvalues = _pvalues(current, factor)
+        candidates = pvalues[first:]
+        if not len(candidates) or np.all(np.isnan(candidates)):
+            break
+        worst = first + int(np.nanargmax(candidates))
+        if pvalues[worst] <= significance:
+            break
+        steps.append({'dropped': names[active[worst]], 'p_value': float(pvalues[worst]),
+                      'p_values': {names[i]: float(p) for i, p in zip(active, pvalues)}})
+        del active[worst]
+        current = equations.subset(active)
+        # Downdate the factor, or retry a full factorization while collinear
+        factor = _cholesky_delete(factor, worst) if factor is not None else _upper_cholesky(current.xtx)
+
+    model = LinearModel(equations.fit_intercept)
+    model.fit_normal_equations(current, [names[i] for i in active[first:]])
+    model.feature_index = [i - first for i in active[first:]]
+    log = {'significance': significance, 'steps': steps, 'selected': model.columns}
+    return model, log
+
+
+def _upper_cholesky(xtx):
+    '''Function returns the upper Cholesky factor R (X'X = R'R), or None if
+    X'X is not positive definite'''
+    try:
+        return linalg.cholesky(xtx, lower=False)
+    except linalg.LinAlgError:
+        return None
+
+
+def _cholesky_delete(R, k):
+    '''Function returns the Cholesky factor after removing column k of X
+
+    Deleting column k of R leaves it upper Hessenberg from column k on; Givens
+    rotations of neighbouring rows zero the subdiagonal again.'''
+    R = np.delete(R, k, axis=1)
+    for j in range(k, R.shape[1]):
+        a, b = R[j, j], R[j + 1, j]
+        r = np.hypot(a, b)
+        if r == 0:
+            continue
+        c, s = a / r, b / r
+        upper, lower = R[j, j:].copy(), R[j + 1, j:].copy()
+        R[j, j:] = c * upper + s * lower
+        R[j + 1, j:] = c * lower - s * upper
+    return R[:-1]
+
+
+def _pvalues(equations, factor):
+    '''Function returns the coefficient p-values from a Cholesky factor, or
+    from a pseudo-inverse when there is none'''
+    if factor is not None:
+        beta = linalg.cho_solve((factor, False), equations.xty)
+        factor_inv = linalg.solve_triangular(factor, np.eye(factor.shape[0]))
+        xtx_inv_diag = (factor_inv ** 2).sum(axis=1)
+        rank = factor.shape[0]
+    else:
+        xtx_inv = np.linalg.pinv(equations.xtx, hermitian=True)
+        beta = xtx_inv @ equations.xty
+        xtx_inv_diag = np.diag(xtx_inv)
+        rank = np.linalg.matrix_rank(equations.xtx, hermitian=True)
+    df_resid = equations.n - rank
+    sigma2 = max(equations.yty - beta @ equations.xty, 0.0) / df_resid
+    bse = np.sqrt(np.clip(xtx_inv_diag, 0, None) * sigma2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _t_pvalues(beta / bse, df_resid)
+
+
+def _t_pvalues(tvalues, df_resid):
+    '''Function returns two-sided p-values of t statistics'''
+    # scipy.stats is slow to import and only needed for fitting, not predicting
+    from scipy import stats
+    return 2 * stats.t.sf(np.abs(tvalues), df_resid)
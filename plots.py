@@ -0,0 +1,247 @@
+"""Headless rendering of the hourly pay figures.
+
+Figures are drawn with matplotlib's object-oriented API on an Agg canvas, so
+no interactive backend is needed and nothing blocks on plt.show(). Each
+figure is written to a directory as PNG and SVG files.
+
+The boxplots are drawn with bxp from precomputed summaries instead of the
+rows. BoxplotSummary keeps a streaming quantile sketch (see
+quantile_sketch.py) of hourly pay for every box of every figure, updated one
+DataFrame at a time, so a feature store can be summarized part by part. The
+boxes show the 5th/25th/50th/75th/95th percentiles with a notch of
+median +/- 1.57 IQR / sqrt(n), as matplotlib's notched boxplot does; fliers
+are not drawn. Summaries are saved as JSON, so the figures can be rendered
+again without the raw data, in parallel processes if wanted.
+
+Usage: python plots.py STORE_DIR [--out DIR] [--jobs N]
+       python plots.py --matrix MATRIX_DIR [--out DIR] [--jobs N]
+       python plots.py --summaries JSON [--out DIR] [--jobs N]"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from quantile_sketch import LogHistogram
+
+DEFAULT_PLOT_DIR = 'plots'
+SUMMARY_FILE = 'boxplot_summary.json'
+FORMATS = ('png', 'svg')
+WHISKERS = (5, 95)
+Y_LIMITS = (1, 3000)
+
+
+def _flag_groups(label):
+    return [(1, '%s in job title' % label), (0, '%s not in job title' % label)]
+
+
+# (file name, heading, grouping column, [(value, panel title), ...] or None
+# for one panel per value in sorted order, figure size)
+BOXPLOT_FIGURES = [
+    ('fiscal_year', 'SALARY V. FISCAL YEAR', 'Fiscal Year', None, (20, 6)),
+    ('gender', 'HOURLY PAY V. GENDER', 'M', [(1, 'Male'), (0, 'Female')], (9, 6)),
+    ('head_coach', 'HOURLY PAY V. "HEAD COACH" JOB FLAG', 'Head Coach', _flag_groups('"Head Coach"'), (9, 6)),
+    ('president', 'HOURLY PAY V. "PRESIDENT" JOB FLAG', 'Pres', _flag_groups('"President"'), (9, 6)),
+    ('chief', 'HOURLY PAY V. "CHIEF" JOB FLAG', 'Chief', _flag_groups('"Chief"'), (9, 6)),
+    ('attorney', 'HOURLY PAY V. "ATTORNEY" JOB FLAG', 'Attorney', _flag_groups('"Attorney"'), (9, 6)),
+    ('legislative_branch', 'HOURLY PAY V. "LEGISLATIVE BRANCH" DEPARTMENT FLAG', 'Leg',
+     [(1, 'Legislative Branch Employee'), (0, 'Not Legislative Branch Employee')], (9, 6)),
+]
+
+
+class BoxplotSummary:
+    '''Quantile sketches of hourly pay for every box of the boxplot figures'''
+
+    def __init__(self, figures=BOXPLOT_FIGURES, relative_accuracy=0.01, value='Hourly_Pay'):
+        self.figures = figures
+        self.relative_accuracy = relative_accuracy
+        self.value = value
+        # Figure name -> {group value: LogHistogram}
+        self.sketches = {figure[0]: {} for figure in figures}
+
+    def update(self, df):
+        '''Function adds the rows of a DataFrame, grouping once per figure'''
+        for name, _, column, groups, _ in self.figures:
+            sketches = self.sketches[name]
+            wanted = None if groups is None else {key for key, _ in groups}
+            for key, series in df.groupby(column, observed=True, sort=False)[self.value]:
+                key = key.item() if hasattr(key, 'item') else key
+                if wanted is not None and key not in wanted:
+                    continue
+                if key not in sketches:
+                    sketches[key] = LogHistogram(self.relative_accuracy)
+                sketches[key].update(series.to_numpy(dtype=np.float64))
+        return self
+
+    def merge(self, other):
+        '''Function adds the sketches of another summary of the same figures'''
+        for name, sketches in other.sketches.items():
+            for key, sketch in sketches.items():
+                if key in self.sketches[name]:
+                    self.sketches[name][key].merge(sketch)
+                else:
+                    self.sketches[name][key] = LogHistogram.from_dict(sketch.to_dict())
+        return self
+
+    def box_stats(self, name):
+        '''Function returns the bxp statistics of the boxes of one figure'''
+        _, _, _, groups, _ = next(figure for figure in self.figures if figure[0] == name)
+        sketches = self.sketches[name]
+        if groups is None:
+            groups = [(key, str(key)) for key in sorted(sketches)]
+        stats = []
+        for key, title in groups:
+            if key in sketches and sketches[key].n:
+                stats.append(dict(box_stats(sketches[key]), title=title))
+        return stats
+
+    def to_dict(self):
+        '''Function returns the summary, with the box statistics and the
+        sketches they come from, as a JSON-serializable dict'''
+        figures = []
+        for name, heading, column, groups, figsize in self.figures:
+            figures.append({'name': name, 'heading': heading, 'column': column,
+                            'groups': groups, 'figsize': list(figsize),
+                            'boxes': self.box_stats(name),
+                            'sketches': [[key, sketch.to_dict()] for key, sketch in self.sketches[name].items()]})
+        return {'value': self.value, 'relative_accuracy': self.relative_accuracy, 'figures': figures}
+
+    @classmethod
+    def from_dict(cls, data):
+        '''Function rebuilds a summary from to_dict output'''
+        figures = [(figure['name'], figure['heading'], figure['column'],
+                    None if figure['groups'] is None else [tuple(group) for group in figure['groups']],
+                    tuple(figure['figsize'])) for figure in data['figures']]
+        summary = cls(figures, data['relative_accuracy'], data['value'])
+        for figure in data['figures']:
+            summary.sketches[figure['name']] = {key: LogHistogram.from_dict(sketch)
+                                                for key, sketch in figure['sketches']}
+        return summary
+
+    def save(self, path):
+        '''Function writes the summary to a JSON file'''
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def box_stats(sketch):
+    '''Function returns the notched box statistics of a quantile sketch in
+    the form bxp draws'''
+    whislo, q1, med, q3, whishi = sketch.quantile([WHISKERS[0] / 100, 0.25, 0.5, 0.75, WHISKERS[1] / 100])
+    notch = 1.57 * (q3 - q1) / np.sqrt(sketch.n)
+    return {'label': '', 'n': sketch.n, 'whislo': whislo, 'q1': q1, 'med': med, 'q3': q3, 'whishi': whishi,
+            'cilo': med - notch, 'cihi': med + notch, 'fliers': []}
+
+
+def save_figure(fig, path, formats=FORMATS):
+    '''Function writes a figure to path.<format> for each format and returns
+    the file names'''
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    FigureCanvasAgg(fig)
+    paths = []
+    for fmt in formats:
+        paths.append('%s.%s' % (path, fmt))
+        fig.savefig(paths[-1])
+    return paths
+
+
+def render_boxplot(stats, path, figsize=(9, 6), formats=FORMATS):
+    '''Function draws one log-scale notched box per panel from precomputed
+    statistics and writes the figure'''
+    fig = Figure(figsize=figsize)
+    for i, stat in enumerate(stats):
+        ax = fig.add_subplot(1, len(stats), i + 1)
+        ax.bxp([stat], shownotches=True, patch_artist=True)
+        ax.set_yscale('log')
+        ax.set_ylim(*Y_LIMITS)
+        ax.set_title(stat['title'])
+        if i == 0:
+            ax.set_ylabel('Hourly Pay [$]')
+    return save_figure(fig, path, formats)
+
+
+def render_scatter(y_true, y_pred, title, path, formats=FORMATS):
+    '''Function draws actual against predicted hourly pay and writes the figure'''
+    fig = Figure(figsize=(6, 6))
+    ax = fig.add_subplot(1, 1, 1)
+    ax.scatter(y_true, y_pred)
+    ax.plot(range(0, 500), ls='--', c='k')
+    ax.set_xlabel('Actual Hourly Pay [$]')
+    ax.set_ylabel('Predicted Hourly Pay [$]')
+    ax.set_xlim(1, 500)
+    ax.set_ylim(1, 500)
+    ax.set_title(title)
+    return save_figure(fig, path, formats)
+
+
+def _render_boxplot(args):
+    return render_boxplot(*args)
+
+
+def render_summary(summary, directory=DEFAULT_PLOT_DIR, formats=FORMATS, n_jobs=1):
+    '''Function renders every boxplot figure of a BoxplotSummary, in n_jobs
+    processes when n_jobs > 1
+
+    Returns a dict of figure heading to written file names.'''
+    jobs = [(summary.box_stats(name), os.path.join(directory, name), figsize, formats)
+            for name, _, _, _, figsize in summary.figures]
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            paths = list(pool.map(_render_boxplot, jobs))
+    else:
+        paths = [_render_boxplot(job) for job in jobs]
+    return {figure[1]: figure_paths for figure, figure_paths in zip(summary.figures, paths)}
+
+
+def render_boxplots(df, directory=DEFAULT_PLOT_DIR, formats=FORMATS, n_jobs=1, figures=BOXPLOT_FIGURES):
+    '''Function summarizes the rows of df, saves the summary as
+    boxplot_summary.json next to the figures and renders the figures'''
+    summary = BoxplotSummary(figures).update(df)
+    summary.save(os.path.join(directory, SUMMARY_FILE))
+    return render_summary(summary, directory, formats, n_jobs)
+
+
+def main(argv=None):
+    from feature_store import FeatureStore
+
+    parser = argparse.ArgumentParser(description='Render the hourly pay boxplots from a feature store or saved summary.')
+    parser.add_argument('store', nargs='?', help='feature store directory (see features.py)')
+    parser.add_argument('--matrix', help='render from a matrix store (see matrix_store.py) instead')
+    parser.add_argument('--summaries', help='render from a saved boxplot summary JSON instead')
+    parser.add_argument('--out', default=DEFAULT_PLOT_DIR, help='directory for the figures')
+    parser.add_argument('--jobs', type=int, default=1, help='processes rendering figures')
+    args = parser.parse_args(argv)
+    if [args.store, args.matrix, args.summaries].count(None) != 2:
+        parser.error('give one of a feature store, --matrix or --summaries')
+
+    if args.summaries:
+        summary = BoxplotSummary.load(args.summaries)
+    else:
+        # Summarize the store one part at a time
+        summary = BoxplotSummary()
+        columns = [figure[2] for figure in summary.figures]
+        if args.matrix:
+            from matrix_store import MatrixStore
+            parts = MatrixStore(args.matrix).iter_frames(columns)
+        else:
+            parts = (part[[summary.value] + columns] for part in FeatureStore(args.store).iter_parts())
+        for part in parts:
+            summary.update(part)
+        print('Summary written to %s' % summary.save(os.path.join(args.out, SUMMARY_FILE)))
+    for heading, paths in render_summary(summary, args.out, n_jobs=args.jobs).items():
+        print('%s: %s' % (heading, ', '.join(paths)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Keyword flags derived from the Salary Book 'Position' (job title) field.
+
+Each entry of POSITION_TAGS maps a flag column to the set of lowercase words
+that switch the flag on when they appear in the title (titles are split on
+whitespace). A keyword starting with '=' must match the whole lowercase title
+instead of a single word. Adding a flag only needs a new entry in the table."""
+
+import numpy as np
+import pandas as pd
+
+from vocabulary import factorize, gather
+
+POSITION_TAGS = {
+    'Head Coach': {'=head coach'},
+    'Coach': {'coach'},
+    'Pres': {'president'},
+    'Vice': {'vice', 'vp'},
+    'Dean': {'dean'},
+    'Physician': {'physician'},
+    'Attorney': {'attorney'},
+    'Eng': {'engineer', 'eng'},
+    'Exec': {'exec', 'executive'},
+    'Lott': {'lottery'},
+    'Grad': {'grad', '=scholar/trainee'},
+    'Prof': {'prof', 'professor'},
+    'Store': {'storekeeper'},
+    'Chief': {'chief'},
+    'Dir': {'director', 'dir'},
+    'Sec': {'secretary'},
+    'Admin': {'admin', 'administrative'},
+    'Cust': {'custodian'},
+    'Intern': {'intern'},
+    'Tech': {'tech', 'technology'},
+    'Teach': {'teacher', 'instructor'},
+    'Americorp': {'americorp'},
+    'Corr': {'correctional'},
+    'Maint': {'maint'},
+    'Clerk': {'clerk'},
+    'Serg': {'sergeant'},
+    'Net': {'network'},
+    'Ath': {'athletics', 'athletic'},
+    'Aide': {'aide'},
+    'Assoc': {'assoc', 'associate'},
+    'Assist': {'asst', 'assist', 'assistant'},
+    'Adjunct': {'adjunct', 'adj'},
+    'Monthly': {'monthly'},
+    'One': {'1', 'i'},
+    'Two': {'2', 'ii'},
+    'Three': {'3', 'iii'},
+    'Four': {'4', 'iv'},
+}
+
+
+def _keyword_index(tags):
+    '''Function inverts the tag table into word -> columns and title -> columns'''
+    words, titles = {}, {}
+    for col, keywords in enumerate(tags.values()):
+        for keyword in keywords:
+            if keyword.startswith('='):
+                titles.setdefault(keyword[1:], []).append(col)
+            else:
+                words.setdefault(keyword, []).append(col)
+    return words, titles
+
+
+def tag_matrix(positions, tags=POSITION_TAGS):
+    '''Function returns a uint8 matrix with one row per position and one column
+    per tag, tokenizing each title a single time'''
+    words, titles = _keyword_index(tags)
+    flags = np.zeros((len(positions), len(tags)), dtype=np.uint8)
+    for row, position in enumerate(positions):
+        if not isinstance(position, str):
+            continue
+        title = position.lower()
+        for col in titles.get(title, ()):
+            flags[row, col] = 1
+        for word in set(title.split()):
+            for col in words.get(word, ()):
+                flags[row, col] = 1
+    return flags
+
+
+def tag_positions(position, tags=POSITION_TAGS, stats=None, sparse=False):
+    '''Function returns a DataFrame of uint8 flag columns for a Position column
+
+    Only the distinct titles are tagged; their flags are gathered back to rows
+    by category code. The optional VocabularyStats records the unique/row
+    ratio. With sparse=True a (scipy.sparse.csr_matrix, column names) pair is
+    returned instead.'''
+    position = pd.Series(position)
+    codes, uniques = factorize(position)
+    if stats is not None:
+        stats.add('Position', uniques, len(position))
+    table = tag_matrix(np.asarray(uniques, dtype=object), tags)
+    if sparse:
+        from scipy import sparse as sp
+        # Trailing all-zero row for null titles (code -1)
+        table = sp.csr_matrix(np.vstack([table, np.zeros((1, len(tags)), dtype=np.uint8)]))
+        return table[codes], list(tags)
+    return pd.DataFrame(gather(table, codes), index=position.index, columns=list(tags))
@@ -0,0 +1,50 @@
+"""Score Salary Book rows with saved models, without retraining or plotting.
+
+Reads Position, Department and Gender from a CSV, builds the same predictors
+the models were trained on and writes one prediction column per model. Rows
+with a Gender other than M or F, which the training build drops, are not
+scored and get NaN.
+
+Usage: python predict_hourly_pay.py CSV [-o OUT] [--models DIR] [--model NAME ...]"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from features import design_matrix
+from model_store import DEFAULT_MODEL_DIR, load_models
+
+PREDICTOR_DTYPES = {'Department': 'category', 'Gender': 'category', 'Position': 'category'}
+
+
+def predict(df, models, feature_columns):
+    '''Function returns a DataFrame with one predicted hourly pay column per
+    model, NaN for rows whose Gender is not M or F'''
+    scored = df['Gender'].isin(['M', 'F']).to_numpy()
+    predictions = pd.DataFrame(np.nan, index=df.index,
+                               columns=['Predicted_Hourly_Pay_' + name for name in models])
+    if scored.any():
+        X, _ = design_matrix(df[scored], columns=feature_columns, sparse=True)
+        for name, model in models.items():
+            predictions.loc[scored, 'Predicted_Hourly_Pay_' + name] = model.predict(X)
+    return predictions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Predict hourly pay for Salary Book rows with saved models.')
+    parser.add_argument('csv', help='CSV with Position, Department and Gender columns')
+    parser.add_argument('-o', '--output', help='output CSV (default: standard output)')
+    parser.add_argument('--models', default=DEFAULT_MODEL_DIR, help='directory of saved models')
+    parser.add_argument('--model', action='append', dest='names', help='model to use (default: all)')
+    args = parser.parse_args(argv)
+
+    models, manifest = load_models(args.models, args.names)
+    df = pd.read_csv(args.csv, usecols=list(PREDICTOR_DTYPES), dtype=PREDICTOR_DTYPES)
+    result = pd.concat([df, predict(df, models, manifest['feature_columns'])], axis=1)
+    result.to_csv(args.output if args.output else sys.stdout, index=False)
+
+
+if __name__ == '__main__':
+    main()
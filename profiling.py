@@ -0,0 +1,149 @@
+"""Per-stage timing and memory instrumentation.
+
+StageTimer records the wall-clock time of named stages and appends it to a
+JSON lines log, so regressions can be tracked. StageProfiler also records,
+for each stage, the CPU time, the peak resident set size of the process at
+the end of the stage and its increase, and, with tracemalloc, the memory
+allocated by Python and NumPy during the stage (net and peak). It writes one
+JSON report per run, and can dump a cProfile of selected stages for
+inspection with pstats or snakeviz."""
+
+import contextlib
+import cProfile
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+from model_store import DEFAULT_MODEL_DIR
+
+TIMINGS_LOG = 'training_times.jsonl'
+DEFAULT_PROFILE_DIR = 'profiles'
+
+
+def peak_rss_mb():
+    '''Function returns the peak resident set size of this process in MB, or
+    None where it cannot be measured
+
+    The resource module only exists on Unix; elsewhere psutil is used if it
+    is installed.'''
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        memory = psutil.Process().memory_info()
+        # peak_wset is the peak working set on Windows
+        return getattr(memory, 'peak_wset', memory.rss) / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def format_mb(value, width=0):
+    '''Function formats a memory size in MB, or '-' if it is None'''
+    return ('%.1f' % value if value is not None else '-').rjust(width)
+
+
+class StageTimer:
+    '''Records the wall-clock time of named stages'''
+
+    def __init__(self):
+        self.seconds = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self):
+        '''Function prints the time of every stage'''
+        for name, seconds in self.seconds.items():
+            print('%-30s %8.2f s' % (name, seconds))
+
+    def append_log(self, directory=DEFAULT_MODEL_DIR, **fields):
+        '''Function appends the stage times as one JSON line to the timings log'''
+        os.makedirs(directory, exist_ok=True)
+        entry = dict(time=time.strftime('%Y-%m-%dT%H:%M:%S'), stages=self.seconds, **fields)
+        with open(os.path.join(directory, TIMINGS_LOG), 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+
+class StageProfiler(StageTimer):
+    '''Records wall time, CPU time, peak RSS and traced allocations of named
+    stages
+
+    trace_memory turns on tracemalloc, which slows allocation-heavy Python
+    code. profile_stages names the stages to run under cProfile; their
+    profiles are written to directory as <stage>.prof.'''
+
+    def __init__(self, directory=DEFAULT_PROFILE_DIR, trace_memory=True, profile_stages=()):
+        super().__init__()
+        self.directory = directory
+        self.trace_memory = trace_memory
+        self.profile_stages = set(profile_stages)
+        self.stages = {}
+        self.started = time.strftime('%Y-%m-%dT%H:%M:%S')
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        rss_before = peak_rss_mb()
+        cpu_start = time.process_time()
+        if self.trace_memory:
+            traced_before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        profiler = cProfile.Profile() if name in self.profile_stages else None
+        if profiler is not None:
+            profiler.enable()
+        try:
+            with super().stage(name):
+                yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                os.makedirs(self.directory, exist_ok=True)
+                profiler.dump_stats(os.path.join(self.directory, '%s.prof' % _slug(name)))
+            record = self.stages.setdefault(name, {'calls': 0, 'cpu_seconds': 0.0})
+            record['calls'] += 1
+            record['wall_seconds'] = self.seconds[name]
+            record['cpu_seconds'] += time.process_time() - cpu_start
+            record['peak_rss_mb'] = peak_rss_mb()
+            record['rss_increase_mb'] = (record['peak_rss_mb'] - rss_before
+                                         if record['peak_rss_mb'] is not None else None)
+            if self.trace_memory:
+                traced_after, traced_peak = tracemalloc.get_traced_memory()
+                record['traced_net_mb'] = (traced_after - traced_before) / 2 ** 20
+                record['traced_peak_mb'] = (traced_peak - traced_before) / 2 ** 20
+
+    def report(self):
+        '''Function prints the time and memory of every stage'''
+        print('%-30s %9s %9s %10s %10s %10s' % ('stage', 'wall s', 'cpu s', 'peak RSS', 'RSS +MB', 'traced MB'))
+        for name, record in self.stages.items():
+            print('%-30s %9.2f %9.2f %s %s %s'
+                  % (name, record['wall_seconds'], record['cpu_seconds'], format_mb(record['peak_rss_mb'], 10),
+                     format_mb(record['rss_increase_mb'], 10), format_mb(record.get('traced_peak_mb'), 10)))
+
+    def write_report(self, **fields):
+        '''Function writes the stage records of this run as a JSON report in
+        the profile directory and returns its path'''
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, 'run-%s.json' % self.started.replace(':', ''))
+        report = dict(started=self.started, finished=time.strftime('%Y-%m-%dT%H:%M:%S'),
+                      argv=sys.argv, python=sys.version.split()[0], trace_memory=self.trace_memory,
+                      stages=self.stages, **fields)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        return path
+
+
+def _slug(name):
+    return re.sub(r'[^A-Za-z0-9]+', '_', name).strip('_').lower()
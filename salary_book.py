@@ -0,0 +1,91 @@
+"""Typed loading of the State of Iowa Salary Book CSV.
+
+Only the columns used by the analysis are read, with compact dtypes. The first
+read of a file writes a columnar cache (Feather when pyarrow is installed,
+otherwise a pickle) keyed on a hash of the file contents, so later runs skip
+CSV parsing entirely."""
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+# Columns used by the analysis and their dtypes. Total Salary Paid stays
+# float64 since hourly pay is compared against it for exact equality.
+SALARY_BOOK_DTYPES = {
+    'Fiscal Year': 'int16',
+    'Department': 'category',
+    'Gender': 'category',
+    'Position': 'category',
+    'Base Salary': 'category',
+    'Total Salary Paid': 'float64',
+    'Travel & Subsistence': 'float32',
+}
+
+DEFAULT_CACHE_DIR = '.salary_book_cache'
+
+
+def file_hash(path, block_size=1 << 20):
+    '''Function returns the SHA-1 hex digest of a file's contents'''
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_salary_book(path, dtypes=SALARY_BOOK_DTYPES, **kwargs):
+    '''Function reads the needed Salary Book columns from CSV with compact dtypes'''
+    return pd.read_csv(path, usecols=list(dtypes), dtype=dtypes, **kwargs)
+
+
+def cache_path(path, dtypes=SALARY_BOOK_DTYPES, cache_dir=None):
+    '''Function returns the cache file for a CSV, keyed on its contents and the
+    column/dtype selection'''
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), DEFAULT_CACHE_DIR)
+    spec = hashlib.sha1(json.dumps(dtypes, sort_keys=True).encode()).hexdigest()
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, '%s-%s-%s%s' % (stem, file_hash(path)[:16], spec[:8], frame_extension()))
+
+
+def load_salary_book(path, dtypes=SALARY_BOOK_DTYPES, cache_dir=None, use_cache=True):
+    '''Function loads the Salary Book, reading from the columnar cache if the
+    CSV has been read before and writing the cache otherwise'''
+    if not use_cache:
+        return read_salary_book(path, dtypes)
+    cached = cache_path(path, dtypes, cache_dir)
+    if os.path.exists(cached):
+        return read_frame(cached)
+    df = read_salary_book(path, dtypes)
+    os.makedirs(os.path.dirname(cached), exist_ok=True)
+    write_frame(df, cached)
+    return df
+
+
+def frame_extension():
+    '''Function returns the file extension used for cached DataFrames'''
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return '.pkl'
+    return '.feather'
+
+
+def read_frame(path):
+    '''Function reads a DataFrame written by write_frame'''
+    if path.endswith('.feather'):
+        return pd.read_feather(path)
+    return pd.read_pickle(path)
+
+
+def write_frame(df, path):
+    '''Function writes a DataFrame as Feather or pickle depending on the extension'''
+    # Write to a temporary file first so an interrupted run leaves no partial file
+    tmp = path + '.tmp'
+    if path.endswith('.feather'):
+        df.reset_index(drop=True).to_feather(tmp)
+    else:
+        df.to_pickle(tmp)
+    os.replace(tmp, path)
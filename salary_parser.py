@@ -0,0 +1,93 @@
+"""Column-level parsing of the Salary Book 'Base Salary' field into hourly pay.
+
+Base Salary is free text such as '$52,000 YR', '18.50 HR' or '1,900 BW'. The
+amount is the first token and the pay unit is the last token, where tokens are
+separated by a space, '/' or '-'. A value with no separator is treated as a
+yearly salary."""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from vocabulary import factorize
+
+# Divisors converting one unit of pay to hourly pay (40 hour weeks). The two
+# tables are applied one after the other, as amount / 40 / 52 for a yearly
+# salary, so results match the original row-wise arithmetic exactly.
+HOURS_PER_WEEK = {'BW': 40, 'HR': 1, 'YR': 40}
+WEEKS_PER_UNIT = {'BW': 2, 'HR': 1, 'YR': 52}
+
+# Hourly pay outside of this range is treated as erroneous data
+MIN_HOURLY_PAY = 5
+MAX_HOURLY_PAY = 3000
+
+# First token (amount) and, if a separator is present, last token (unit)
+_BASE_SALARY_RE = r'(?s)^(?P<amount>[^ /\-]*)(?:.*[ /\-](?P<unit>[^ /\-]*))?$'
+
+
+def parse_hourly_pay(base_salary, total_salary):
+    '''Function converts Base Salary strings to hourly pay for a whole column
+
+    Rows that cannot be parsed, use an unknown pay unit, fall outside of
+    MIN_HOURLY_PAY < pay < MAX_HOURLY_PAY or equal Total Salary Paid are NaN.'''
+    base_salary = pd.Series(base_salary)
+    # Parse each distinct Base Salary once and gather the result back by code
+    codes, uniques = factorize(base_salary)
+    hourly = np.append(_unit_hourly_pay(pd.Series(uniques, dtype=object)), np.nan)[codes]
+
+    with np.errstate(invalid='ignore'):
+        keep = (hourly > MIN_HOURLY_PAY) & (hourly < MAX_HOURLY_PAY)
+    total_salary = pd.Series(total_salary, index=base_salary.index)
+    if pd.api.types.is_numeric_dtype(total_salary):
+        keep &= hourly != total_salary.to_numpy(dtype=float)
+    hourly[~keep] = np.nan
+    return pd.Series(hourly, index=base_salary.index, name='Hourly_Pay')
+
+
+def _unit_hourly_pay(base_salary):
+    '''Function converts Base Salary strings to hourly pay without filtering'''
+    amount, unit = _split_base_salary(base_salary)
+    amount = pd.to_numeric(amount.str.replace(r'[,$]', '', regex=True),
+                           errors='coerce')
+    amount = amount.to_numpy(dtype=float, na_value=np.nan)
+    # Values without a separator are yearly salaries
+    unit = unit.fillna('YR')
+    return (amount
+            / unit.map(HOURS_PER_WEEK).to_numpy(dtype=float, na_value=np.nan)
+            / unit.map(WEEKS_PER_UNIT).to_numpy(dtype=float, na_value=np.nan))
+
+
+def _split_base_salary(base_salary):
+    '''Function extracts the amount and unit tokens from Base Salary strings'''
+    parts = base_salary.astype('string').str.strip().str.extract(_BASE_SALARY_RE)
+    return parts['amount'], parts['unit']
+
+
+# Original row-wise implementation, kept as the reference for benchmarks and
+# for checking that parse_hourly_pay gives the same result row for row
+def hourly_sal(cols):
+    base_sal = cols.iloc[0]
+    total_sal = cols.iloc[1]
+    if pd.isnull(base_sal):
+        return
+    elif base_sal.lower() == 'terminated' or base_sal.lower() == 'terminated ' or base_sal == 'HR' or base_sal == 'YR' or base_sal == 'HR+H517753' or base_sal == '20.12HR' or base_sal == '262.99DA':
+        return
+    else:
+        base_sal = base_sal.strip()
+        base_sal = re.split(' |/|-', base_sal)
+        base_sal[0] = base_sal[0].replace(',', '')
+        base_sal[0] = base_sal[0].replace('$', '')
+        if base_sal[-1] == 'BW':
+            hourly_sal = float(base_sal[0]) / 40 / 2
+        elif base_sal[-1] == 'HR':
+            hourly_sal = float(base_sal[0])
+        elif base_sal[-1] == 'YR' or len(base_sal) == 1:
+            hourly_sal = float(base_sal[0]) / 40 / 52
+        else:
+            return
+        # Remove entries with erroneous data (hourly pay very high or very low)
+        if hourly_sal < 3000 and hourly_sal > 5 and hourly_sal != total_sal:
+            return hourly_sal
+        else:
+            return
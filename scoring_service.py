@@ -0,0 +1,220 @@
+"""Local HTTP service that predicts hourly pay for single employee records.
+
+The saved model (see model_store.py) is loaded once and kept in memory.
+Records are JSON objects with Position, Department and Gender, for example
+
+    {"Position": "Assoc Professor", "Department": "University of Iowa", "Gender": "F"}
+
+POST /predict takes one record or a list of records and returns
+{"predictions": [...]}. Requests that arrive within max_wait_ms of each other
+are scored together in one model.predict call; malformed records, including
+a Gender other than M or F, get a 400 reply before they are batched, and a
+request that still fails is retried on its own so it cannot fail the others
+in its batch. GET /stats returns the request count, batch sizes and p50/p99
+latency in milliseconds.
+
+Usage: python scoring_service.py [--models DIR] [--model NAME] [--port N]"""
+
+import argparse
+import collections
+import json
+import queue
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from features import design_matrix
+from model_store import DEFAULT_MODEL_DIR, load_models
+
+RECORD_FIELDS = ['Position', 'Department', 'Gender']
+
+
+def check_records(records):
+    '''Function raises ValueError unless every record is a JSON object whose
+    Position and Department are strings or null and whose Gender is M or F,
+    the only rows the models were trained on'''
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise ValueError('Record %d is not a JSON object' % i)
+        for field in ['Position', 'Department']:
+            if not isinstance(record.get(field), (str, type(None))):
+                raise ValueError('Record %d: %s must be a string' % (i, field))
+        if record.get('Gender') not in ('M', 'F'):
+            raise ValueError('Record %d: Gender must be "M" or "F"' % i)
+
+
+class MicroBatcher:
+    '''Collects records from concurrent requests and scores them in batches'''
+
+    def __init__(self, model, feature_columns, max_batch=256, max_wait_ms=2.0):
+        self.model = model
+        self.feature_columns = feature_columns
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.requests = queue.Queue()
+        self.latencies = collections.deque(maxlen=100000)
+        self.batch_sizes = collections.deque(maxlen=100000)
+        self.lock = threading.Lock()
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def predict(self, records):
+        '''Function blocks until the records have been scored and returns the
+        predictions'''
+        start = time.perf_counter()
+        pending = {'records': records, 'done': threading.Event()}
+        self.requests.put(pending)
+        pending['done'].wait()
+        with self.lock:
+            self.latencies.append(time.perf_counter() - start)
+        if 'error' in pending:
+            raise pending['error']
+        return pending['predictions']
+
+    def _run(self):
+        while True:
+            batch = [self.requests.get()]
+            n_records = len(batch[0]['records'])
+            deadline = time.perf_counter() + self.max_wait
+            while n_records < self.max_batch:
+                try:
+                    batch.append(self.requests.get(timeout=max(deadline - time.perf_counter(), 0)))
+                except queue.Empty:
+                    break
+                n_records += len(batch[-1]['records'])
+            self._score(batch)
+
+    def _predict(self, records):
+        df = pd.DataFrame(records, columns=RECORD_FIELDS)
+        X, _ = design_matrix(df, columns=self.feature_columns, sparse=True)
+        return self.model.predict(X).tolist()
+
+    def _score(self, batch):
+        records = [record for pending in batch for record in pending['records']]
+        try:
+            predictions = self._predict(records)
+        except Exception:
+            # Score each request on its own, so a bad request only fails itself
+            for pending in batch:
+                try:
+                    pending['predictions'] = self._predict(pending['records'])
+                except Exception as error:
+                    pending['error'] = error
+                pending['done'].set()
+            return
+        with self.lock:
+            self.batch_sizes.append(len(records))
+        start = 0
+        for pending in batch:
+            stop = start + len(pending['records'])
+            pending['predictions'] = predictions[start:stop]
+            pending['done'].set()
+            start = stop
+
+    def stats(self):
+        '''Function returns request, batch and latency statistics'''
+        with self.lock:
+            latencies = np.array(self.latencies) * 1000
+            batch_sizes = np.array(self.batch_sizes)
+        if not len(latencies):
+            return {'requests': 0}
+        return {
+            'requests': len(latencies),
+            'batches': len(batch_sizes),
+            'mean_batch_size': float(batch_sizes.mean()) if len(batch_sizes) else 0.0,
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p99_ms': float(np.percentile(latencies, 99)),
+        }
+
+
+def make_handler(batcher):
+    '''Function returns a request handler class bound to a MicroBatcher'''
+
+    class ScoringHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path == '/stats':
+                self._reply(200, batcher.stats())
+            else:
+                self._reply(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self._reply(404, {'error': 'not found'})
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                records = body if isinstance(body, list) else [body]
+                check_records(records)
+                self._reply(200, {'predictions': batcher.predict(records) if records else []})
+            except (ValueError, KeyError, TypeError) as error:
+                self._reply(400, {'error': str(error)})
+            except Exception as error:
+                self._reply(500, {'error': '%s: %s' % (type(error).__name__, error)})
+
+        def _reply(self, status, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ScoringHandler
+
+
+def make_server(models_dir=DEFAULT_MODEL_DIR, model_name='random_forest', host='127.0.0.1', port=8765,
+                max_batch=256, max_wait_ms=2.0):
+    '''Function loads a saved model and returns an HTTP server scoring with it'''
+    models, manifest = load_models(models_dir, [model_name])
+    batcher = MicroBatcher(models[model_name], manifest['feature_columns'], max_batch, max_wait_ms)
+    server = ThreadingHTTPServer((host, port), make_handler(batcher))
+    server.batcher = batcher
+    return server
+
+
+def score(records, url='http://127.0.0.1:8765'):
+    '''Function sends one record or a list of records to a running service and
+    returns the predictions'''
+    request = urllib.request.Request(url + '/predict', data=json.dumps(records).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())['predictions']
+
+
+def service_stats(url='http://127.0.0.1:8765'):
+    '''Function returns the latency statistics of a running service'''
+    with urllib.request.urlopen(url + '/stats') as response:
+        return json.loads(response.read())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve hourly pay predictions over local HTTP.')
+    parser.add_argument('--models', default=DEFAULT_MODEL_DIR, help='directory of saved models')
+    parser.add_argument('--model', default='random_forest', help='saved model to serve')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-batch', type=int, default=256, help='most records scored in one batch')
+    parser.add_argument('--max-wait-ms', type=float, default=2.0, help='time to wait for a batch to fill')
+    args = parser.parse_args(argv)
+
+    server = make_server(args.models, args.model, args.host, args.port, args.max_batch, args.max_wait_ms)
+    print('Serving %s on http://%s:%d' % (args.model, args.host, args.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.batcher.stats()))
+
+
+if __name__ == '__main__':
+    main()
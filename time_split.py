@@ -0,0 +1,97 @@
+"""Rolling evaluation by fiscal year.
+
+Each fold trains on the years up to N and tests on year N + 1, rolling forward
+over the years held in an incremental state directory (see incremental.py).
+Every year's featurized rows are read from its cached partition once and its
+predictor matrix is built from the stored flag columns, so no fold reloads or
+re-tags the CSV. The linear model is fitted from the cumulative sum of the
+per-year normal equations, so a linear fold costs one small solve.
+
+The result has one row per engine and test year with the error metrics (see
+metrics.py) and the time spent on the fold.
+
+Usage: python time_split.py [--state DIR] [--csv CSV] [--engines NAME ...]"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from cross_validation import make_model
+from features import build_features, feature_matrix
+from incremental import DEFAULT_STATE_DIR, IncrementalState
+from metrics import regression_metrics
+from ols import backward_elimination
+from salary_book import read_salary_book
+
+ENGINES = ['linear_regression', 'random_forest', 'hist_gradient_boosting']
+
+
+def rolling_evaluation(state, engines=ENGINES, params=None, seed=0, min_train_years=1):
+    '''Function trains on the years up to N and tests on year N + 1 for every
+    year of the state, for each engine
+
+    params maps engine names to model parameters (see
+    cross_validation.make_model). Returns a DataFrame with one row per engine
+    and test year.'''
+    params = params or {}
+    years = state.years()
+    columns = state.manifest()['feature_columns']
+    X, y = {}, {}
+    for year in years:
+        df_year = state.partition(year).read()
+        X[year] = feature_matrix(df_year, columns)
+        y[year] = df_year['Hourly_Pay'].to_numpy(dtype=np.float64)
+
+    rows = []
+    equations = None
+    for i, test_year in enumerate(years[1:], start=1):
+        train_years = years[:i]
+        start = time.perf_counter()
+        if equations is None:
+            equations = state.equations(train_years[0])
+        else:
+            equations += state.equations(train_years[-1])
+        accumulate_seconds = time.perf_counter() - start
+        if len(train_years) < min_train_years:
+            continue
+        X_train = y_train = None
+        for engine in engines:
+            start = time.perf_counter()
+            if engine == 'linear_regression':
+                model, _ = backward_elimination(equations, columns)
+                fold_seconds = accumulate_seconds
+            else:
+                if X_train is None:
+                    X_train = sparse.vstack([X[year] for year in train_years], format='csr')
+                    y_train = np.concatenate([y[year] for year in train_years])
+                model = make_model(engine, params.get(engine, {}), seed).fit(X_train, y_train)
+                fold_seconds = 0.0
+            predictions = model.predict(X[test_year])
+            fold_seconds += time.perf_counter() - start
+            rows.append(dict(engine=engine, train_years='%d-%d' % (train_years[0], train_years[-1]),
+                             test_year=test_year, train_rows=equations.n, test_rows=len(y[test_year]),
+                             **regression_metrics(y[test_year], predictions)._asdict(), fold_seconds=fold_seconds))
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Train on fiscal years up to N and test on year N + 1.')
+    parser.add_argument('--state', default=DEFAULT_STATE_DIR, help='incremental state directory')
+    parser.add_argument('--csv', nargs='*', default=[], help='Salary Book CSVs to add to the state first')
+    parser.add_argument('--engines', nargs='+', default=ENGINES, choices=ENGINES)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    state = IncrementalState(args.state)
+    for csv in args.csv:
+        for year, rows in build_features(read_salary_book(csv)).groupby('Fiscal Year', sort=True):
+            state.add_year(int(year), rows)
+    results = rolling_evaluation(state, args.engines, seed=args.seed)
+    print(results.to_string(index=False, float_format=lambda v: '%.2f' % v))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Model training helpers for the hourly pay models.
+
+Random forests are trained on all cores (n_jobs=-1). A saved forest can be
+grown with extra trees fitted on a new fiscal year's data instead of being
+refitted from scratch. Histogram-based gradient boosting is available as a
+faster, smaller alternative to the forest. The linear model can be trained
+out of core, one featurized chunk at a time. The time of each training stage
+is appended to a JSON lines log (see profiling.py).
+
+Usage: python training.py NEW_YEAR_CSV [--trees N] [--models DIR]"""
+
+import argparse
+import pickle
+
+import numpy as np
+from scipy import sparse
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import FunctionTransformer
+
+from features import build_features, design_matrix, feature_matrix
+from model_store import DEFAULT_MODEL_DIR, load_models, save_models
+from ols import NormalEquations, backward_elimination
+from profiling import StageTimer
+from salary_book import read_salary_book
+
+
+def fit_random_forest(X, y, n_estimators=100, n_jobs=-1, random_state=None, warm_start_from=None):
+    '''Function fits a RandomForestRegressor on all cores
+
+    With warm_start_from, n_estimators new trees are fitted on X, y and added
+    to the given forest instead of training a new one.'''
+    if warm_start_from is None:
+        model = RandomForestRegressor(n_estimators=n_estimators, n_jobs=n_jobs, random_state=random_state)
+    else:
+        model = warm_start_from
+        model.set_params(warm_start=True, n_jobs=n_jobs,
+                         n_estimators=len(model.estimators_) + n_estimators)
+    return model.fit(X, y)
+
+
+def fit_linear_out_of_core(frames, feature_columns, significance=0.05):
+    '''Function fits the linear model one featurized DataFrame at a time
+
+    frames is any iterable of featurized DataFrames, e.g. the parts of a
+    FeatureStore or build_features over CSV chunks. Only the normal equations
+    (a k x k matrix) are kept between chunks, so memory use is bounded by the
+    largest chunk, and the fit is exact rather than an approximation.
+    Predictors with large p values are removed by backward elimination as in
+    the in-memory fit. Returns the model, the elimination log and the number
+    of chunks read.'''
+    equations = NormalEquations(len(feature_columns))
+    chunks = 0
+    for df_an in frames:
+        equations.update(feature_matrix(df_an, feature_columns), df_an['Hourly_Pay'])
+        chunks += 1
+    model, elimination = backward_elimination(equations, feature_columns, significance)
+    return model, elimination, chunks
+
+
+def coefficient_difference(model, reference):
+    '''Function returns the largest absolute difference between the
+    coefficients of two linear models'''
+    if list(model.columns) != list(reference.columns):
+        raise ValueError('The models use different predictors: %s and %s'
+                         % (sorted(set(model.columns) - set(reference.columns)),
+                            sorted(set(reference.columns) - set(model.columns))))
+    return float(np.max(np.abs(np.asarray(model.params) - np.asarray(reference.params))))
+
+
+def dense_float32(X):
+    '''Function converts a sparse or dense matrix to a dense float32 array'''
+    if sparse.issparse(X):
+        return X.astype(np.float32).toarray()
+    return np.asarray(X, dtype=np.float32)
+
+
+def make_hist_gradient_boosting(max_iter=200, learning_rate=0.1, random_state=None, **params):
+    '''Function returns an unfitted histogram-based gradient boosting regressor
+
+    The booster needs dense input, so it is wrapped in a pipeline that
+    densifies sparse X to float32 when fitting and predicting.'''
+    return make_pipeline(
+        FunctionTransformer(dense_float32, accept_sparse=True),
+        HistGradientBoostingRegressor(max_iter=max_iter, learning_rate=learning_rate,
+                                      random_state=random_state, **params))
+
+
+def fit_hist_gradient_boosting(X, y, max_iter=200, learning_rate=0.1, random_state=None):
+    '''Function fits a histogram-based gradient boosting regressor'''
+    return make_hist_gradient_boosting(max_iter, learning_rate, random_state).fit(X, y)
+
+
+def model_size(model):
+    '''Function returns the size of a fitted model in bytes when pickled'''
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def grow_forest(csv, n_estimators=10, directory=DEFAULT_MODEL_DIR, model_name='random_forest'):
+    '''Function adds trees fitted on a new Salary Book CSV to a saved forest and
+    saves it again with the timings of each stage'''
+    timer = StageTimer()
+    with timer.stage('load model'):
+        models, manifest = load_models(directory, mmap_mode=None)
+    with timer.stage('featurize'):
+        df_an = build_features(read_salary_book(csv))
+        X, _ = design_matrix(df_an, columns=manifest['feature_columns'], sparse=True)
+    with timer.stage('grow random forest'):
+        models[model_name] = fit_random_forest(X, df_an['Hourly_Pay'], n_estimators,
+                                               warm_start_from=models[model_name])
+    metadata = {key: value for key, value in manifest.items() if key not in ('feature_columns', 'models')}
+    # Keep the training times of the saved models; the JSON lines log keeps
+    # the history of every grow
+    metadata['grow_seconds'] = timer.seconds
+    # The grown forest has not been evaluated, so its old test errors no longer apply
+    test_metrics = {name: m for name, m in metadata.pop('test_metrics', {}).items() if name != model_name}
+    if test_metrics:
+        metadata['test_metrics'] = test_metrics
+    save_models(models, manifest['feature_columns'], directory, metadata)
+    timer.append_log(directory, command='grow', csv=csv, rows=X.shape[0],
+                     n_estimators=len(models[model_name].estimators_))
+    return models[model_name], timer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Add trees fitted on a new fiscal year to the saved random forest.')
+    parser.add_argument('csv', help='Salary Book CSV with the new rows')
+    parser.add_argument('--trees', type=int, default=10, help='number of trees to add')
+    parser.add_argument('--models', default=DEFAULT_MODEL_DIR, help='directory of saved models')
+    args = parser.parse_args(argv)
+
+    model, timer = grow_forest(args.csv, args.trees, args.models)
+    print('Random forest now has %d trees' % len(model.estimators_))
+    timer.report()
+
+
+if __name__ == '__main__':
+    main()
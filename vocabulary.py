@@ -0,0 +1,64 @@
+"""Helpers for computing features once per distinct value of a column.
+
+Text columns such as Position and Department repeat the same few thousand
+values across hundreds of thousands of rows. They are factorized into integer
+codes, features are computed on the table of unique values, and the rows of
+that table are gathered back by code."""
+
+import numpy as np
+import pandas as pd
+
+
+def factorize(column):
+    '''Function returns (codes, uniques) for a column, with code -1 for nulls
+
+    Categorical columns reuse their existing codes and categories.'''
+    column = pd.Series(column)
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(), column.cat.categories
+    return pd.factorize(column)
+
+
+def gather(table, codes):
+    '''Function returns the rows of a per-unique-value table for each code
+
+    Rows with code -1 (null values) are all zeros.'''
+    table = np.asarray(table)
+    padded = np.zeros((table.shape[0] + 1,) + table.shape[1:], dtype=table.dtype)
+    padded[:-1] = table
+    return padded[codes]
+
+
+class VocabularyStats:
+    '''Counts distinct values against rows for each factorized column
+
+    The distinct values themselves are kept, so the statistics of chunks or
+    partitions of a column can be merged without counting a value twice.'''
+
+    def __init__(self):
+        self.values = {}
+        self.rows = {}
+
+    def add(self, name, uniques, n_rows):
+        self.values.setdefault(name, set()).update(uniques)
+        self.rows[name] = self.rows.get(name, 0) + n_rows
+
+    def merge(self, other):
+        '''Function adds the statistics of another VocabularyStats'''
+        for name, values in other.values.items():
+            self.add(name, values, other.rows[name])
+
+    @property
+    def counts(self):
+        '''Column name -> (number of distinct values, number of rows)'''
+        return {name: (len(values), self.rows[name]) for name, values in self.values.items()}
+
+    def ratio(self, name):
+        n_unique, n_rows = self.counts[name]
+        return n_unique / n_rows if n_rows else 0.0
+
+    def report(self):
+        '''Function prints the unique/row ratio of every column'''
+        for name, (n_unique, n_rows) in self.counts.items():
+            print('%s: %d unique values in %d rows (unique/row ratio %.4f)'
+                  % (name, n_unique, n_rows, self.ratio(name)))